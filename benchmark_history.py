@@ -0,0 +1,105 @@
+"""Benchmark memori dan waktu muat riwayat unduhan
+
+Membandingkan format lama (satu file JSON berisi list dict, dimuat dengan
+json.load) dengan DownloadHistory yang ringkas (JSON Lines, decode malas).
+
+Penggunaan:
+    python benchmark_history.py [jumlah_entri]
+"""
+import gc
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import tracemalloc
+
+from download_history import DownloadHistory
+
+
+def make_legacy_history(path, count):
+    """Menulis file riwayat format lama dengan entri sintetis"""
+    downloads = [
+        {
+            'title': f"Video sintetis nomor {i} - judul yang cukup panjang",
+            'url': f"https://www.youtube.com/watch?v={i:011d}",
+            'filepath': f"/storage/emulated/0/Download/Video_sintetis_{i}.mp4",
+            'thumbnail': f"https://i.ytimg.com/vi/{i:011d}/maxresdefault.jpg",
+            'date': f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d} 12:{i % 60:02d}:00",
+            'size': f"{(i % 900) + 1.5:.2f} MB",
+            'status': 'completed'
+        }
+        for i in range(count)
+    ]
+    with open(path, 'w') as f:
+        json.dump(downloads, f, indent=2)
+
+
+def measure(label, load, setup=None):
+    """Mengukur waktu dan memori dari fungsi load
+
+    Waktu diukur tanpa tracemalloc karena pelacakan memori memperlambat
+    alokasi; memori diukur pada pemanggilan kedua. setup dipanggil sebelum
+    setiap pemanggilan load.
+    """
+    if setup:
+        setup()
+    gc.collect()
+    start = time.perf_counter()
+    load()
+    elapsed = time.perf_counter() - start
+
+    if setup:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    result = load()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<34} {elapsed * 1000:>9.1f} ms {current / 1e6:>9.1f} MB {peak / 1e6:>9.1f} MB")
+    return result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    data_dir = tempfile.mkdtemp(prefix='ytdl_bench_')
+    try:
+        legacy_file = os.path.join(data_dir, 'download_history.json')
+        make_legacy_history(legacy_file, count)
+
+        print(f"{count} entri riwayat")
+        print(f"{'':<34} {'waktu':>12} {'tetap':>12} {'puncak':>12}")
+
+        def load_legacy():
+            with open(legacy_file) as f:
+                return json.load(f)
+
+        measure("format lama (json.load)", load_legacy)
+
+        history_file = os.path.join(data_dir, 'download_history.jsonl')
+
+        def remove_new_history():
+            if os.path.exists(history_file):
+                os.remove(history_file)
+
+        # Pemuatan pertama memigrasikan file lama ke JSON Lines
+        measure("DownloadHistory (migrasi)", lambda: DownloadHistory(data_dir),
+                setup=remove_new_history)
+        measure("DownloadHistory (muat)", lambda: DownloadHistory(data_dir))
+        def load_and_decode():
+            history = DownloadHistory(data_dir)
+            for download in history.iter_downloads(check_files=False):
+                download.title
+            return history
+
+        measure("DownloadHistory (muat + decode)", load_and_decode)
+
+        print(f"ukuran file: lama {os.path.getsize(legacy_file) / 1e6:.1f} MB, "
+              f"baru {os.path.getsize(history_file) / 1e6:.1f} MB")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Uji beban mode worker di satu mesin tanpa jaringan
+
+Menjalankan koordinator dan beberapa worker lokal dengan fungsi unduh stub
+(tidur sebentar lalu menulis file kecil), kemudian melaporkan waktu total,
+pembagian job per worker, dan jumlah entri riwayat. Dengan --kill-one satu
+worker dihentikan paksa di tengah jalan untuk menguji pengambilan ulang job
+yang lease-nya kedaluwarsa.
+
+Penggunaan:
+    python benchmark_worker.py [--jobs 40] [--workers 4] [--delay 0.2] [--kill-one]
+
+Stub yang sama dapat dipakai langsung dari worker.py:
+    python worker.py coordinator --spool DIR --download-func benchmark_worker:stub_download URL ...
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from collections import Counter
+
+from download_history import DownloadHistory
+from worker import Coordinator, start_local_workers
+
+# Lama "unduhan" stub dalam detik; diatur lewat variabel lingkungan agar
+# ikut terbawa ke proses worker
+STUB_DELAY_ENV = 'YTDL_STUB_DELAY'
+
+
+def stub_download(url, download_dir, format_string):
+    """Pengganti download_video yang tidak memakai jaringan
+
+    Returns:
+        tuple: (info, filepath) seperti utils.download_video
+    """
+    time.sleep(float(os.environ.get(STUB_DELAY_ENV, '0.2')))
+    video_id = url.rsplit('=', 1)[-1]
+    filepath = os.path.join(download_dir, f"{video_id}.mp4")
+    with open(filepath, 'w') as f:
+        f.write(f"{url}\n{format_string}\n")
+    return {'title': f"Stub {video_id}", 'uploader': f"pid {os.getpid()}"}, filepath
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Uji beban mode worker dengan unduhan stub")
+    parser.add_argument('--jobs', type=int, default=40)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--delay', type=float, default=0.2, help="Lama tiap unduhan stub dalam detik")
+    parser.add_argument('--kill-one', action='store_true', help="Hentikan paksa satu worker di tengah jalan")
+    args = parser.parse_args(argv)
+
+    os.environ[STUB_DELAY_ENV] = str(args.delay)
+    root = tempfile.mkdtemp(prefix='ytdl_workers_')
+    download_dir = os.path.join(root, 'downloads')
+    os.makedirs(download_dir)
+    lease_timeout = 3
+
+    processes = []
+    try:
+        coordinator = Coordinator(os.path.join(root, 'spool'), DownloadHistory(os.path.join(root, 'data')),
+                                  lease_timeout=lease_timeout)
+        start = time.perf_counter()
+        processes = start_local_workers(coordinator.spool.root, args.workers,
+                                        download_dir=download_dir, download_func=stub_download,
+                                        lease_timeout=lease_timeout, heartbeat_interval=0.5,
+                                        poll_interval=0.1)
+        job_ids = [coordinator.submit(f"https://www.youtube.com/watch?v={i:011d}") for i in range(args.jobs)]
+
+        if args.kill_one and processes:
+            time.sleep(args.delay * 1.5)
+            processes[0].kill()
+            print(f"worker pid {processes[0].pid} dihentikan paksa")
+
+        results = coordinator.wait(job_ids, poll_interval=0.1, timeout=args.jobs * args.delay + 60)
+        elapsed = time.perf_counter() - start
+
+        completed = [r for r in results.values() if r.get('status') == 'completed']
+        print(f"{len(completed)}/{args.jobs} job selesai dalam {elapsed:.2f} detik "
+              f"(serial: {args.jobs * args.delay:.2f} detik)")
+        for worker_id, count in sorted(Counter(r['worker_id'] for r in completed).items()):
+            print(f"  {worker_id}: {count}")
+        print(f"entri riwayat: {len(coordinator.history)}")
+        return 0 if len(completed) == args.jobs == len(coordinator.history) else 1
+    finally:
+        for process in processes:
+            process.terminate()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
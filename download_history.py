@@ -1,58 +1,283 @@
 import os
+import re
+import sys
 import json
+import threading
 from datetime import datetime
 
+from history_search import HistoryIndex, SearchResults, parse_query
+from utils import extract_video_id
+
+# Urutan kolom setiap baris di file riwayat
+_FIELDS = ('title', 'url', 'filepath', 'thumbnail', 'date', 'size_bytes', 'status', 'uploader', 'sha256')
+
+
+def format_size(size_bytes):
+    """Mengubah ukuran dalam byte ke format yang mudah dibaca manusia
+    
+    Args:
+        size_bytes (int): Ukuran file dalam byte
+    
+    Returns:
+        str: Ukuran file dengan unit (B, KB, MB, GB) yang sesuai
+    """
+    size = float(size_bytes)
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size < 1024 or unit == 'GB':
+            return f"{size:.2f} {unit}"
+        size /= 1024
+    
+    return "0 B"  # Fallback
+
+
+def _parse_size(size_string):
+    """Mengubah string ukuran lama (mis. '12.34 MB') kembali ke byte
+    
+    Returns:
+        int: Ukuran dalam byte, atau None jika string tidak dikenali
+    """
+    match = re.match(r'^\s*([\d.]+)\s*(B|KB|MB|GB)\s*$', size_string or '')
+    if not match:
+        return None
+    
+    multiplier = 1024 ** ['B', 'KB', 'MB', 'GB'].index(match.group(2))
+    return int(float(match.group(1)) * multiplier)
+
+
+class HistoryEntry:
+    """Satu entri riwayat unduhan dengan representasi yang ringkas
+    
+    Entri yang dimuat dari disk hanya menyimpan baris JSON mentah; kolom
+    baru di-decode saat pertama kali diakses. String yang sering berulang
+    (direktori file, status, pengunggah) di-intern sehingga dipakai bersama antar entri.
+    
+    Entri juga mendukung akses seperti dict (entry['title'], entry.get(...))
+    agar kompatibel dengan kode yang memakai format riwayat lama.
+    """
+    
+    __slots__ = ('_raw', '_title', '_url', '_dirname', '_basename',
+                 '_thumbnail', '_date', '_size_bytes', '_status', '_uploader', '_sha256')
+    
+    def __init__(self, raw=None, row=None):
+        """Membuat entri dari baris JSON mentah atau dari list kolom
+        
+        Args:
+            raw (str, optional): Baris dari file riwayat, di-decode secara malas
+            row (list, optional): Nilai kolom sesuai urutan _FIELDS
+        """
+        self._raw = raw
+        if row is not None:
+            self._set_row(row)
+    
+    def _set_row(self, row):
+        """Mengisi slot dari list kolom"""
+        row = list(row) + [None] * (len(_FIELDS) - len(row))
+        title, url, filepath, thumbnail, date, size_bytes, status, uploader, sha256 = row[:len(_FIELDS)]
+        dirname, basename = os.path.split(filepath or '')
+        
+        self._title = title or ''
+        self._url = url or ''
+        self._dirname = sys.intern(dirname)
+        self._basename = basename
+        self._thumbnail = thumbnail or ''
+        self._date = date or ''
+        self._size_bytes = size_bytes
+        self._status = sys.intern(status or 'completed')
+        self._uploader = sys.intern(uploader or '')
+        self._sha256 = sha256 or ''
+        self._raw = None
+    
+    def _decode(self):
+        """Men-decode baris mentah jika belum dilakukan"""
+        if self._raw is None:
+            return
+        
+        try:
+            row = json.loads(self._raw)
+            if not isinstance(row, list):
+                raise ValueError("baris riwayat bukan list")
+        except ValueError as e:
+            print(f"Error parsing baris riwayat: {e}")
+            row = []
+        self._set_row(row)
+    
+    def to_row(self):
+        """Mengembalikan nilai kolom sesuai urutan _FIELDS"""
+        self._decode()
+        return [self._title, self._url, self.filepath, self._thumbnail,
+                self._date, self._size_bytes, self._status, self._uploader, self._sha256]
+    
+    def to_line(self):
+        """Mengembalikan baris JSON untuk disimpan ke file
+        
+        Entri yang belum pernah diakses ditulis ulang apa adanya tanpa decode.
+        """
+        if self._raw is not None:
+            return self._raw.rstrip('\n')
+        return json.dumps(self.to_row(), ensure_ascii=False, separators=(',', ':'))
+    
+    def to_dict(self):
+        """Mengembalikan entri dalam format dict seperti riwayat lama"""
+        return {key: self[key] for key in _FIELDS + ('size',)}
+    
+    @property
+    def title(self):
+        self._decode()
+        return self._title
+    
+    @property
+    def url(self):
+        self._decode()
+        return self._url
+    
+    @property
+    def filepath(self):
+        self._decode()
+        if not self._dirname:
+            return self._basename
+        return os.path.join(self._dirname, self._basename)
+    
+    @property
+    def thumbnail(self):
+        self._decode()
+        return self._thumbnail
+    
+    @property
+    def date(self):
+        self._decode()
+        return self._date
+    
+    @property
+    def size_bytes(self):
+        self._decode()
+        return self._size_bytes
+    
+    @property
+    def status(self):
+        self._decode()
+        return self._status
+    
+    @status.setter
+    def status(self, value):
+        self._decode()
+        self._status = sys.intern(value)
+    
+    @property
+    def uploader(self):
+        self._decode()
+        return self._uploader
+    
+    @property
+    def sha256(self):
+        self._decode()
+        return self._sha256
+    
+    @property
+    def size(self):
+        """Ukuran file yang sudah diformat, dihitung saat diakses"""
+        size_bytes = self.size_bytes
+        if size_bytes is None:
+            return "File tidak ada" if self.status == 'file_missing' else "Tidak diketahui"
+        return format_size(size_bytes)
+    
+    def __getitem__(self, key):
+        if key not in _FIELDS and key != 'size':
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+    
+    def __repr__(self):
+        return f"HistoryEntry({self.title!r}, {self.filepath!r})"
+
+
 class DownloadHistory:
     """Kelas untuk mengelola riwayat unduhan
     
     Kelas ini menangani penyimpanan dan pengambilan data riwayat unduhan.
-    Riwayat disimpan dalam format JSON dan mempertahankan informasi tentang
-    video yang telah diunduh, termasuk judul, URL, jalur file, tanggal, dan ukuran.
+    Riwayat disimpan dalam format JSON Lines (satu baris per unduhan, kolom
+    berurutan tanpa nama key) sehingga dapat dimuat secara streaming dan
+    unduhan baru cukup ditambahkan di akhir file. File riwayat lama
+    (download_history.json) dimigrasikan otomatis saat pertama kali dimuat.
     
     Attributes:
         data_dir (str): Direktori untuk menyimpan file riwayat
-        history_file (str): Path lengkap ke file riwayat JSON
-        downloads (list): Daftar entri riwayat unduhan
+        history_file (str): Path lengkap ke file riwayat JSON Lines
+        legacy_history_file (str): Path file riwayat JSON format lama
     """
     
-    def __init__(self):
+    def __init__(self, data_dir=None):
         """Inisialisasi objek riwayat unduhan
         
         Mendeteksi platform (Android atau desktop) dan menyiapkan
         direktori penyimpanan yang sesuai. Kemudian memuat riwayat
         unduhan dari disk jika tersedia.
+        
+        Args:
+            data_dir (str, optional): Direktori data; jika tidak diberikan
+                dipilih otomatis sesuai platform
         """
-        # Coba dapatkan direktori data aplikasi
-        try:
-            # Path untuk Android
-            from android.storage import app_storage_path
-            self.data_dir = app_storage_path()
-        except ImportError:
-            # Fallback untuk platform non-Android
-            self.data_dir = os.path.expanduser('~/.ytdownloader')
-            if not os.path.exists(self.data_dir):
-                os.makedirs(self.data_dir)
-        
-        self.history_file = os.path.join(self.data_dir, 'download_history.json')
-        self.downloads = self._load_downloads()
+        if data_dir is not None:
+            self.data_dir = data_dir
+        else:
+            # Coba dapatkan direktori data aplikasi
+            try:
+                # Path untuk Android
+                from android.storage import app_storage_path
+                self.data_dir = app_storage_path()
+            except ImportError:
+                # Fallback untuk platform non-Android
+                self.data_dir = os.path.expanduser('~/.ytdownloader')
+        
+        if not os.path.exists(self.data_dir):
+            os.makedirs(self.data_dir)
+        
+        self.history_file = os.path.join(self.data_dir, 'download_history.jsonl')
+        self.legacy_history_file = os.path.join(self.data_dir, 'download_history.json')
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._index = None
+        # Perubahan yang terjadi selama indeks dibangun, diterapkan sebelum dipakai
+        self._index_log = None
+        self._video_ids = None
+        self._checksums = None
+        # Disimpan dari yang terlama ke terbaru, sesuai urutan di file
+        self._entries = self._load_downloads()
     
     def _load_downloads(self):
         """Memuat riwayat unduhan dari file
         
+        Baris dibaca secara streaming dan tidak di-decode sampai diakses.
+        
         Returns:
-            list: Daftar riwayat unduhan, kosong jika tidak ada file atau terjadi error
+            list: Daftar HistoryEntry, kosong jika tidak ada file atau terjadi error
         """
         if not os.path.exists(self.history_file):
+            return self._migrate_legacy_history()
+        
+        try:
+            with open(self.history_file, 'r', encoding='utf-8') as f:
+                return [HistoryEntry(raw=line) for line in f if line.strip()]
+        except Exception as e:
+            print(f"Error memuat riwayat unduhan: {e}")
+            return []
+    
+    def _migrate_legacy_history(self):
+        """Mengubah file riwayat JSON lama ke format JSON Lines
+        
+        Returns:
+            list: Daftar HistoryEntry hasil migrasi, kosong jika tidak ada riwayat lama
+        """
+        if not os.path.exists(self.legacy_history_file):
             return []
         
         try:
-            with open(self.history_file, 'r') as f:
+            with open(self.legacy_history_file, 'r') as f:
                 data = json.load(f)
-                # Validasi bahwa data adalah list
-                if not isinstance(data, list):
-                    print("Format file riwayat tidak valid, membuat riwayat baru")
-                    return []
-                return data
         except json.JSONDecodeError as e:
             print(f"Error parsing file riwayat: {e}")
             return []
@@ -60,22 +285,54 @@ class DownloadHistory:
             print(f"Error memuat riwayat unduhan: {e}")
             return []
     
+        # Validasi bahwa data adalah list
+        if not isinstance(data, list):
+            print("Format file riwayat tidak valid, membuat riwayat baru")
+            return []
+        
+        entries = []
+        # Riwayat lama disimpan dari yang terbaru
+        for download in reversed(data):
+            if not isinstance(download, dict):
+                continue
+            row = [download.get(key) for key in _FIELDS]
+            row[_FIELDS.index('size_bytes')] = _parse_size(download.get('size'))
+            entries.append(HistoryEntry(row=row))
+        
+        self._entries = entries
+        self._save_downloads()
+        return entries
+    
     def _save_downloads(self):
         """Menyimpan riwayat unduhan ke file
         
-        Menulis data riwayat unduhan ke disk dalam format JSON.
+        Menulis seluruh riwayat ke file sementara lalu menggantinya secara
+        atomik, sehingga file tidak rusak jika aplikasi berhenti di tengah jalan.
         """
         try:
             # Pastikan direktori ada
             if not os.path.exists(os.path.dirname(self.history_file)):
                 os.makedirs(os.path.dirname(self.history_file))
                 
-            with open(self.history_file, 'w') as f:
-                json.dump(self.downloads, f, indent=2)
+            tmp_file = self.history_file + '.tmp'
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                for entry in self._entries:
+                    f.write(entry.to_line())
+                    f.write('\n')
+            os.replace(tmp_file, self.history_file)
+        except Exception as e:
+            print(f"Error menyimpan riwayat unduhan: {e}")
+    
+    def _append_download(self, entry):
+        """Menambahkan satu entri di akhir file riwayat tanpa menulis ulang semuanya"""
+        try:
+            with open(self.history_file, 'a', encoding='utf-8') as f:
+                f.write(entry.to_line())
+                f.write('\n')
         except Exception as e:
             print(f"Error menyimpan riwayat unduhan: {e}")
     
-    def add_download(self, title, url, filepath, thumbnail=''):
+    def add_download(self, title, url, filepath, thumbnail='', uploader='', sha256=''):
         """Menambahkan unduhan baru ke riwayat
         
         Args:
@@ -83,84 +340,103 @@ class DownloadHistory:
             url (str): URL video YouTube
             filepath (str): Path file lokal tempat video disimpan
             thumbnail (str, optional): URL thumbnail video
+            uploader (str, optional): Nama pengunggah video
+            sha256 (str, optional): Hash SHA-256 isi file
             
         Returns:
-            dict: Entri unduhan yang baru ditambahkan
+            HistoryEntry: Entri unduhan yang baru ditambahkan
         """
-        # Buat entri unduhan
-        download = {
-            'title': title,
-            'url': url,
-            'filepath': filepath,
-            'thumbnail': thumbnail,
-            'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'size': self._get_file_size(filepath)
-        }
-        
         # Periksa apakah file ada
-        if not os.path.exists(filepath):
-            download['status'] = 'file_missing'
-        else:
-            download['status'] = 'completed'
+        status = 'completed' if os.path.exists(filepath) else 'file_missing'
         
-        # Tambahkan ke daftar dan simpan
-        self.downloads.insert(0, download)  # Tambahkan ke awal daftar
-        self._save_downloads()
+        # Buat entri unduhan
+        download = HistoryEntry(row=[
+            title,
+            url,
+            filepath,
+            thumbnail,
+            datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            self._get_file_size(filepath),
+            status,
+            uploader,
+            sha256
+        ])
+        
+        # Tambahkan ke daftar, indeks pencarian, dan simpan
+        with self._lock:
+            self._entries.append(download)
+            if self._index is not None:
+                self._index.add(download)
+            elif self._index_log is not None:
+                self._index_log.append(('add', download))
+            if self._video_ids is not None:
+                self._video_ids.add(extract_video_id(url) or url)
+            if self._checksums is not None and sha256:
+                self._checksums.add(sha256)
+            self._append_download(download)
         
         return download
     
     def _get_file_size(self, filepath):
-        """Mendapatkan ukuran file dalam format yang mudah dibaca manusia
+        """Mendapatkan ukuran file dalam byte
         
         Args:
             filepath (str): Path ke file
             
         Returns:
-            str: Ukuran file dengan unit (B, KB, MB, GB) yang sesuai
+            int: Ukuran file dalam byte, atau None jika file tidak ada atau terjadi error
         """
         try:
             if not os.path.exists(filepath):
-                return "File tidak ada"
-                
-            size_bytes = os.path.getsize(filepath)
-            
-            for unit in ['B', 'KB', 'MB', 'GB']:
-                if size_bytes < 1024 or unit == 'GB':
-                    return f"{size_bytes:.2f} {unit}"
-                size_bytes /= 1024
-                
-            return "0 B"  # Fallback
+                return None
+            return os.path.getsize(filepath)
         except Exception as e:
             print(f"Error mendapatkan ukuran file: {e}")
-            return "Tidak diketahui"
+            return None
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def iter_downloads(self, check_files=True):
+        """Mengiterasi unduhan dari yang terbaru tanpa menyalin daftar
+        
+        Args:
+            check_files (bool, optional): Perbarui status file yang mungkin
+                telah dipindahkan atau dihapus
+        
+        Yields:
+            HistoryEntry: Entri unduhan
+        """
+        for download in reversed(self._entries):
+            # Perbarui status jika file tidak ada lagi
+            if check_files and download.status == 'completed' and not os.path.exists(download.filepath):
+                download.status = 'file_missing'
+            
+            yield download
     
     def get_downloads(self):
         """Mendapatkan daftar unduhan
         
         Juga memperbarui status file yang mungkin telah dipindahkan atau dihapus.
+        Untuk riwayat besar gunakan iter_downloads agar tidak membuat list baru.
         
         Returns:
-            list: Daftar semua entri unduhan
+            list: Daftar semua entri unduhan, dari yang terbaru
         """
-        # Filter entri dengan file yang hilang jika mereka ditandai sebagai selesai
-        valid_downloads = []
-        
-        for download in self.downloads:
-            # Perbarui status jika file tidak ada lagi
-            if download.get('status') == 'completed' and not os.path.exists(download.get('filepath', '')):
-                download['status'] = 'file_missing'
-            
-            valid_downloads.append(download)
-        
-        return valid_downloads
+        return list(self.iter_downloads())
     
     def clear_downloads(self):
         """Menghapus semua riwayat unduhan
         
         Menghapus semua entri dari riwayat dan menyimpan perubahan ke disk.
         """
-        self.downloads = []
-        self._save_downloads()
+        with self._lock:
+            self._entries = []
+            self._index = None
+            self._index_log = None
+            self._video_ids = None
+            self._checksums = None
+            self._save_downloads()
     
     def remove_download(self, filepath):
         """Menghapus unduhan tertentu dari riwayat
@@ -171,11 +447,106 @@ class DownloadHistory:
         Returns:
             bool: True jika item dihapus, False jika tidak ditemukan
         """
-        old_count = len(self.downloads)
-        self.downloads = [d for d in self.downloads if d.get('filepath') != filepath]
+        with self._lock:
+            removed = [d for d in self._entries if d.filepath == filepath]
+            if not removed:
+                return False
         
-        # Simpan jika ada perubahan
-        if old_count != len(self.downloads):
+            self._entries = [d for d in self._entries if d.filepath != filepath]
+            for download in removed:
+                if self._index is not None:
+                    self._index.remove(download)
+                elif self._index_log is not None:
+                    self._index_log.append(('remove', download))
+            self._video_ids = None
+            self._checksums = None
+            
+            # Simpan karena ada perubahan
             self._save_downloads()
             return True
-        return False
+
+    def has_video(self, url):
+        """Memeriksa apakah video sudah pernah diunduh
+        
+        URL dibandingkan berdasarkan ID video, sehingga youtu.be/ID dan
+        youtube.com/watch?v=ID dianggap sama.
+        
+        Args:
+            url (str): URL video YouTube
+        
+        Returns:
+            bool: True jika video ada di riwayat
+        """
+        with self._lock:
+            if self._video_ids is None:
+                self._video_ids = {extract_video_id(d.url) or d.url for d in self._entries}
+            return (extract_video_id(url) or url) in self._video_ids
+    
+    def has_checksum(self, sha256):
+        """Memeriksa apakah file dengan isi yang sama sudah ada di riwayat
+        
+        Args:
+            sha256 (str): Hash SHA-256 isi file
+        
+        Returns:
+            bool: True jika ada entri dengan hash yang sama
+        """
+        if not sha256:
+            return False
+        
+        with self._lock:
+            if self._checksums is None:
+                self._checksums = {d.sha256 for d in self._entries if d.sha256}
+            return sha256 in self._checksums
+    
+    def build_index(self):
+        """Membangun indeks pencarian jika belum ada
+        
+        Pembangunan pertama men-decode semua entri, jadi sebaiknya dipanggil
+        dari thread background sebelum pencarian pertama. Indeks dibangun di
+        luar lock riwayat agar add_download tidak ikut tertahan; perubahan
+        selama pembangunan dicatat lalu diterapkan sebelum indeks dipasang.
+        """
+        with self._build_lock:
+            while True:
+                with self._lock:
+                    if self._index is not None:
+                        return
+                    entries = list(self._entries)
+                    self._index_log = log = []
+                
+                index = HistoryIndex(entries)
+                
+                with self._lock:
+                    # Riwayat dihapus selama pembangunan; bangun ulang
+                    if self._index_log is not log:
+                        continue
+                    for action, download in log:
+                        getattr(index, action)(download)
+                    self._index = index
+                    self._index_log = None
+                    return
+    
+    def search(self, query='', limit=None):
+        """Mencari unduhan berdasarkan judul, pengunggah, URL, dan tanggal
+        
+        Query mendukung filter tanggal 'after:YYYY-MM-DD' dan
+        'before:YYYY-MM-DD' (inklusif). Kata terakhir dicocokkan sebagai
+        awalan sehingga hasil sudah muncul saat pengguna masih mengetik.
+        
+        Args:
+            query (str, optional): Teks pencarian
+            limit (int, optional): Jumlah hasil maksimum
+        
+        Returns:
+            SearchResults: HistoryEntry yang cocok, diurutkan dari yang paling
+            relevan; atribut truncated menandai hasil awalan yang dipotong
+        """
+        terms, date_from, date_to = parse_query(query)
+        
+        self.build_index()
+        with self._lock:
+            # Riwayat bisa saja dihapus tepat setelah indeks dibangun
+            if self._index is None:
+                return SearchResults()
+            return self._index.search(terms, date_from, date_to, limit)
@@ -0,0 +1,239 @@
+import re
+import heapq
+from bisect import bisect_left, insort
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+_DATE_FILTER_RE = re.compile(r'\b(after|before):(\d{4}-\d{2}-\d{2})\b', re.IGNORECASE)
+
+# Bobot kecocokan per kolom; judul paling menentukan relevansi
+FIELD_WEIGHTS = {
+    'title': 3.0,
+    'uploader': 2.0,
+    'url': 1.0,
+}
+
+# Bagian URL yang muncul di hampir semua entri dan tidak membantu pencarian
+_URL_STOPWORDS = {'http', 'https', 'www', 'm', 'youtube', 'youtu', 'be', 'com', 'watch', 'v', 'shorts'}
+
+# Kecocokan awalan bernilai lebih rendah dari kecocokan kata utuh
+PREFIX_WEIGHT = 0.5
+
+# Batas jumlah entri yang dinilai dari perluasan satu awalan, agar awalan
+# satu huruf tidak menilai seluruh riwayat. Yang dibatasi jumlah entri, bukan
+# jumlah kata: semua kata berawalan sama tetap diperluas selama batas ini
+# belum tercapai, sehingga awalan yang spesifik selalu mendapat semua hasilnya
+MAX_PREFIX_ENTRIES = 20000
+
+
+def tokenize(text):
+    """Memecah teks menjadi kata-kata huruf kecil
+
+    Args:
+        text (str): Teks yang akan dipecah
+
+    Returns:
+        list: Daftar kata
+    """
+    return _TOKEN_RE.findall((text or '').lower())
+
+
+def parse_query(query):
+    """Memisahkan kata pencarian dari filter tanggal
+
+    Args:
+        query (str): Teks pencarian, mis. 'musik after:2024-01-01 before:2024-06-30'
+
+    Returns:
+        tuple: (terms, date_from, date_to) - terms adalah list kata, tanggal
+               berupa string 'YYYY-MM-DD' atau None
+    """
+    date_from = None
+    date_to = None
+    for kind, date in _DATE_FILTER_RE.findall(query or ''):
+        if kind.lower() == 'after':
+            date_from = date
+        else:
+            date_to = date
+
+    terms = [t for t in tokenize(_DATE_FILTER_RE.sub(' ', query or '')) if t not in _URL_STOPWORDS]
+    return terms, date_from, date_to
+
+
+class SearchResults(list):
+    """Daftar hasil pencarian
+
+    Attributes:
+        truncated (bool): True jika perluasan awalan mencapai
+            MAX_PREFIX_ENTRIES sehingga sebagian kecocokan tidak dinilai
+    """
+
+    truncated = False
+
+
+class HistoryIndex:
+    """Indeks terbalik (inverted index) untuk pencarian riwayat unduhan
+
+    Setiap kata dari judul, pengunggah, dan URL dipetakan ke entri yang
+    memuatnya beserta bobotnya. Daftar kata terurut dipakai untuk
+    pencocokan awalan dengan bisect. Indeks diperbarui per entri saat
+    unduhan ditambah atau dihapus, tanpa dibangun ulang.
+
+    Entri cukup memiliki atribut title, uploader, url, dan date.
+    """
+
+    def __init__(self, entries=()):
+        self._postings = {}
+        self._vocabulary = []
+        self._order = {}
+        self._next_order = 0
+        for entry in entries:
+            self._add(entry)
+        # Saat membangun awal, kosakata cukup diurutkan sekali di akhir
+        self._vocabulary = sorted(self._postings)
+
+    def _entry_weights(self, entry):
+        """Menghitung bobot setiap kata untuk satu entri"""
+        weights = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(getattr(entry, field, '')):
+                if field == 'url' and token in _URL_STOPWORDS:
+                    continue
+                weights[token] = weights.get(token, 0.0) + weight
+        return weights
+
+    def add(self, entry):
+        """Menambahkan entri ke indeks
+
+        Args:
+            entry: Entri riwayat (HistoryEntry)
+        """
+        for token in self._add(entry):
+            insort(self._vocabulary, token)
+
+    def _add(self, entry):
+        """Menambahkan entri ke posting list
+
+        Returns:
+            list: Kata yang baru pertama kali muncul di indeks
+        """
+        new_tokens = []
+        # Urutan penambahan dipakai untuk memilih entri terbaru saat skor sama
+        self._order[entry] = self._next_order
+        self._next_order += 1
+
+        for token, weight in self._entry_weights(entry).items():
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = {}
+                new_tokens.append(token)
+            posting[entry] = weight
+        return new_tokens
+
+    def remove(self, entry):
+        """Menghapus entri dari indeks
+
+        Args:
+            entry: Entri riwayat yang sebelumnya ditambahkan
+        """
+        if self._order.pop(entry, None) is None:
+            return
+
+        for token in self._entry_weights(entry):
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            posting.pop(entry, None)
+            if not posting:
+                del self._postings[token]
+                index = bisect_left(self._vocabulary, token)
+                if index < len(self._vocabulary) and self._vocabulary[index] == token:
+                    del self._vocabulary[index]
+
+    def __len__(self):
+        return len(self._order)
+
+    def _match_term(self, term, allow_prefix, candidates=None):
+        """Mengumpulkan skor entri untuk satu kata pencarian
+
+        Args:
+            term (str): Kata pencarian
+            allow_prefix (bool): Juga mencocokkan kata yang berawalan term
+            candidates (dict, optional): Jika diberikan, hanya entri ini yang
+                dinilai
+
+        Returns:
+            tuple: (scores, truncated) - skor per entri, dan True jika
+                   perluasan awalan berhenti di MAX_PREFIX_ENTRIES
+        """
+        scores = dict(self._postings.get(term, ()))
+        if not allow_prefix:
+            return scores, False
+
+        for position in range(bisect_left(self._vocabulary, term), len(self._vocabulary)):
+            token = self._vocabulary[position]
+            if not token.startswith(term):
+                break
+            if token == term:
+                continue
+            if len(scores) >= MAX_PREFIX_ENTRIES:
+                return scores, True
+            for entry, weight in self._postings[token].items():
+                if candidates is not None and entry not in candidates:
+                    continue
+                scores[entry] = max(scores.get(entry, 0.0), weight * PREFIX_WEIGHT)
+        return scores, False
+
+    def search(self, terms, date_from=None, date_to=None, limit=None):
+        """Mencari entri yang memuat semua kata
+
+        Kata terakhir juga dicocokkan sebagai awalan karena pengguna mungkin
+        belum selesai mengetik. Jika ada kata lain, perluasan awalan hanya
+        menilai entri yang cocok dengan kata-kata tersebut.
+
+        Args:
+            terms (list): Kata pencarian dari parse_query
+            date_from (str, optional): Tanggal awal 'YYYY-MM-DD' (inklusif)
+            date_to (str, optional): Tanggal akhir 'YYYY-MM-DD' (inklusif)
+            limit (int, optional): Jumlah hasil maksimum
+
+        Returns:
+            SearchResults: Entri yang cocok, dari skor tertinggi lalu yang terbaru
+        """
+        def in_range(entry):
+            date = entry.date[:10]
+            if date_from and date < date_from:
+                return False
+            if date_to and date > date_to:
+                return False
+            return True
+
+        if not terms:
+            # Tanpa kata pencarian, tampilkan semua entri dari yang terbaru
+            ordered = sorted(self._order, key=self._order.get, reverse=True)
+            matches = [entry for entry in ordered if in_range(entry)]
+            return SearchResults(matches[:limit] if limit else matches)
+
+        scores = None
+        truncated = False
+        for position, term in enumerate(terms):
+            term_scores, term_truncated = self._match_term(
+                term, allow_prefix=position == len(terms) - 1, candidates=scores)
+            truncated = truncated or term_truncated
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {entry: score + term_scores[entry]
+                          for entry, score in scores.items() if entry in term_scores}
+            if not scores:
+                return SearchResults()
+
+        def rank(entry):
+            return (scores[entry], self._order[entry])
+
+        candidates = [entry for entry in scores if in_range(entry)]
+        if limit:
+            results = SearchResults(heapq.nlargest(limit, candidates, key=rank))
+        else:
+            results = SearchResults(sorted(candidates, key=rank, reverse=True))
+        results.truncated = truncated
+        return results
@@ -16,8 +16,10 @@ import os
 import time
 import re
 
-from utils import extract_video_info, download_video, check_valid_url
+from utils import download_video, check_valid_url, get_download_dir
 from download_history import DownloadHistory
+from prefetch import MetadataPrefetcher
+from subscriptions import SubscriptionStore, SubscriptionScheduler, is_subscription_url
 
 # Set default window size for development
 Window.size = (400, 700)
@@ -60,9 +62,27 @@ class HomeScreen(Screen):
     quality_options = ListProperty(['Best', '1080p', '720p', '480p', '360p', 'Audio only'])
     
     def __init__(self, **kwargs):
+        self.download_history = kwargs.pop('download_history', None)
+        if self.download_history is None:
+            self.download_history = DownloadHistory()
         super(HomeScreen, self).__init__(**kwargs)
-        self.download_history = DownloadHistory()
         self.download_thread = None
+        self.prefetcher = MetadataPrefetcher()
+        self._url_debounce = None
+    
+    def on_url_text(self, text):
+        """Debounce URL input and start speculative metadata fetch"""
+        if self._url_debounce is not None:
+            self._url_debounce.cancel()
+        self._url_debounce = Clock.schedule_once(lambda dt: self.speculate_url(text.strip()), 0.5)
+    
+    def speculate_url(self, url):
+        """Prefetch video info for a pasted URL before the user taps check"""
+        self._url_debounce = None
+        if not check_valid_url(url):
+            return
+        self.prefetcher.cancel_others(url)
+        self.prefetcher.prefetch(url)
         
     def check_url(self):
         """Validate the URL and get video information"""
@@ -76,15 +96,35 @@ class HomeScreen(Screen):
             self.show_error('Invalid YouTube URL format')
             return
             
+        # Use speculative result if the prefetch already finished
+        video_info = self.prefetcher.get(url)
+        if video_info:
+            self.update_video_info(video_info)
+            return
+            
         self.ids.url_status.text = "Fetching video info..."
         
         # Start thread to fetch video info
         threading.Thread(target=self.fetch_video_info, args=(url,), daemon=True).start()
     
+    def subscribe_url(self):
+        """Subscribe to the channel or playlist in the URL field"""
+        url = self.ids.url_input.text.strip()
+        
+        if not is_subscription_url(url):
+            self.show_error('Please enter a YouTube channel or playlist URL')
+            return
+            
+        app = App.get_running_app()
+        subscription = app.subscriptions.add(url)
+        # Record the current position now so only later uploads are downloaded
+        app.subscription_scheduler.check_now()
+        self.ids.url_status.text = f"Subscribed to {subscription['kind']}"
+    
     def fetch_video_info(self, url):
         """Fetch video information in a separate thread"""
         try:
-            video_info = extract_video_info(url)
+            video_info = self.prefetcher.fetch(url)
             
             # Update UI in main thread
             Clock.schedule_once(lambda dt: self.update_video_info(video_info), 0)
@@ -115,6 +155,12 @@ class HomeScreen(Screen):
         # Convert UI quality option to format string for yt-dlp
         format_string = self.get_format_string(quality)
         
+        # Prefer the pre-resolved format, falling back to the generic selector
+        plan = self.prefetcher.get_format_plan(url, quality)
+        if plan:
+            format_string = f"{plan['format_id']}/{format_string}"
+        info_json = self.prefetcher.get_info_json(url)
+        
         # Reset progress
         self.download_progress = 0
         self.current_status = "Starting download..."
@@ -123,7 +169,7 @@ class HomeScreen(Screen):
         # Start download in a thread
         self.download_thread = threading.Thread(
             target=self.download_thread_func,
-            args=(url, format_string),
+            args=(url, format_string, info_json),
             daemon=True
         )
         self.download_thread.start()
@@ -147,17 +193,11 @@ class HomeScreen(Screen):
             return 'bestaudio[ext=m4a]/bestaudio'
         return 'best'
     
-    def download_thread_func(self, url, format_string):
+    def download_thread_func(self, url, format_string, info_json=None):
         """Thread function to handle the download process"""
         try:
             # Get download directory (will be different on Android vs development)
-            try:
-                from android.storage import primary_external_storage_path
-                download_dir = os.path.join(primary_external_storage_path(), 'Download')
-            except ImportError:
-                download_dir = os.path.expanduser('~/Downloads')
-                if not os.path.exists(download_dir):
-                    os.makedirs(download_dir)
+            download_dir = get_download_dir()
             
             # Progress callback
             def progress_hook(d):
@@ -173,12 +213,16 @@ class HomeScreen(Screen):
                     # Store progress to be picked up by update_progress
                     self._progress = percentage
                     self._status = f"Downloading: {percentage:.1f}%"
-                    
+
+                elif d['status'] == 'retrying':
+                    self._status = f"Connection problem ({d['error_class']}), retrying (attempt {d['attempt']})..."
+
                 elif d['status'] == 'finished':
                     self._status = "Download complete. Processing video..."
             
             # Perform download
-            info, filepath = download_video(url, download_dir, format_string, progress_hook)
+            info, filepath = download_video(url, download_dir, format_string, progress_hook,
+                                            info_json=info_json)
             
             if not info or not filepath:
                 raise Exception("Download failed without error")
@@ -188,7 +232,8 @@ class HomeScreen(Screen):
                 title=info.get('title', 'Unknown'),
                 url=url,
                 filepath=filepath,
-                thumbnail=info.get('thumbnail', '')
+                thumbnail=info.get('thumbnail', ''),
+                uploader=info.get('uploader', '')
             )
             
             # Final update on main thread
@@ -243,35 +288,115 @@ class HomeScreen(Screen):
 
 class HistoryScreen(Screen):
     """Screen for showing download history"""
+    # Number of history rows added to the list per frame
+    ITEMS_PER_FRAME = 20
+    # Maximum number of search results shown
+    SEARCH_LIMIT = 500
+    
     def __init__(self, **kwargs):
+        self.download_history = kwargs.pop('download_history', None)
+        if self.download_history is None:
+            self.download_history = DownloadHistory()
         super(HistoryScreen, self).__init__(**kwargs)
-        self.download_history = DownloadHistory()
+        self._search_debounce = None
+        self._stream_event = None
+        self._pending_items = None
+        self._shown_items = 0
+        self._search_generation = 0
     
     def on_enter(self):
         """Called when screen is entered - refresh history"""
+        # Build the search index off the UI thread before the first query
+        threading.Thread(target=self.download_history.build_index, daemon=True).start()
         self.load_history()
     
+    def on_search_text(self, text):
+        """Debounce search input while the user is typing"""
+        if self._search_debounce is not None:
+            self._search_debounce.cancel()
+        self._search_debounce = Clock.schedule_once(lambda dt: self.load_history(), 0.2)
+    
     def load_history(self):
-        """Load download history into the UI"""
+        """Load download history, filtered by the search box, into the UI"""
+        self._search_debounce = None
+        query = self.ids.search_input.text.strip()
+        # Results of older searches still running are discarded
+        self._search_generation += 1
+        
+        if not len(self.download_history):
+            self.show_history_items(iter(()), "No download history yet")
+        elif query:
+            # The first search may wait for the index build, so keep it off the UI thread
+            threading.Thread(
+                target=self.search_thread_func,
+                args=(query, self._search_generation),
+                daemon=True
+            ).start()
+        else:
+            self.show_history_items(self.download_history.iter_downloads(), "No download history yet")
+    
+    def search_thread_func(self, query, generation):
+        """Thread function to run a history search"""
+        results = self.download_history.search(query, limit=self.SEARCH_LIMIT)
+        Clock.schedule_once(lambda dt: self.show_search_results(results, generation), 0)
+    
+    def show_search_results(self, results, generation):
+        """Show search results unless a newer search has started"""
+        if generation != self._search_generation:
+            return
+        note = None
+        if results.truncated:
+            note = "Too many matches to rank them all - keep typing to narrow the search"
+        self.show_history_items(iter(results), "No matching downloads", note)
+    
+    def show_history_items(self, downloads, empty_text, note=None):
+        """Stream history entries into the list a few rows per frame"""
+        if self._stream_event is not None:
+            self._stream_event.cancel()
+        
         history_container = self.ids.history_container
         history_container.clear_widgets()
+        if note:
+            history_container.add_widget(Label(text=note,
+                                               font_size=14,
+                                               size_hint_y=None,
+                                               height=40,
+                                               text_size=(Window.width - 40, None),
+                                               halign='center',
+                                               color=(0.9, 0.6, 0.2, 1)))
         
-        downloads = self.download_history.get_downloads()
-        
-        if not downloads:
-            history_container.add_widget(Label(text="No download history yet", 
-                                              font_size=18,
-                                              color=(0.7, 0.7, 0.7, 1)))
-            return
+        self._pending_items = downloads
+        self._empty_text = empty_text
+        self._shown_items = 0
+        self._stream_event = Clock.schedule_interval(self._add_history_batch, 0)
+        self._add_history_batch(0)
+    
+    def _add_history_batch(self, dt):
+        """Add the next batch of history rows (called by Clock)"""
+        history_container = self.ids.history_container
         
-        for download in downloads:
+        for _ in range(self.ITEMS_PER_FRAME):
+            download = next(self._pending_items, None)
+            if download is None:
+                if self._shown_items == 0:
+                    history_container.add_widget(Label(text=self._empty_text, 
+                                                      font_size=18,
+                                                      color=(0.7, 0.7, 0.7, 1)))
+                if self._stream_event is not None:
+                    self._stream_event.cancel()
+                    self._stream_event = None
+                return False
+            
             item = DownloadItem(
-                title=download['title'],
+                title=download.title,
                 thumbnail='',  # Not displaying thumbnails for simplicity
-                date=download['date'],
-                file_path=download['filepath']
+                date=download.date,
+                file_path=download.filepath
             )
             history_container.add_widget(item)
+            self._shown_items += 1
+        
+        return True
     
     def clear_history(self):
         """Clear all download history"""
@@ -317,18 +442,45 @@ class HistoryScreen(Screen):
 
 class YTDownloaderApp(App):
     """Main application class"""
+    # Subscription sync settings
+    SUBSCRIPTION_INTERVAL = 6 * 60 * 60  # seconds between checks
+    SUBSCRIPTION_WINDOWS = []  # allowed (start_hour, end_hour) ranges, empty = any time
+    SUBSCRIPTION_CONCURRENCY = 1
+    
     def build(self):
         # Create screen manager and screens
         sm = ScreenManager()
         
-        home_screen = HomeScreen(name='home')
-        history_screen = HistoryScreen(name='history')
+        # Both screens share one history so new downloads show up immediately
+        download_history = DownloadHistory()
+        home_screen = HomeScreen(name='home', download_history=download_history)
+        history_screen = HistoryScreen(name='history', download_history=download_history)
         
         sm.add_widget(home_screen)
         sm.add_widget(history_screen)
         
+        # Subscription sync runs on its own threads, not the Kivy clock
+        self.subscriptions = SubscriptionStore(download_history.data_dir)
+        self.subscription_scheduler = SubscriptionScheduler(
+            self.subscriptions,
+            download_history,
+            get_download_dir(),
+            home_screen.get_format_string('Best'),
+            interval=self.SUBSCRIPTION_INTERVAL,
+            windows=self.SUBSCRIPTION_WINDOWS,
+            concurrency=self.SUBSCRIPTION_CONCURRENCY
+        )
+        
         return sm
 
+    def on_start(self):
+        self.subscription_scheduler.start()
+
+    def on_stop(self):
+        self.subscription_scheduler.stop(timeout=1)
+        # Discard speculative work and cached info files
+        self.root.get_screen('home').prefetcher.close()
+
 
 if __name__ == '__main__':
     YTDownloaderApp().run()
@@ -0,0 +1,310 @@
+import os
+import time
+import shutil
+import socket
+import tempfile
+import threading
+from collections import OrderedDict
+
+from utils import extract_video_info, check_valid_url
+
+# Batas tinggi video per opsi kualitas di UI; None berarti tanpa batas
+QUALITY_HEIGHTS = {
+    'Best': None,
+    '1080p': 1080,
+    '720p': 720,
+    '480p': 480,
+    '360p': 360,
+}
+
+AUDIO_ONLY = 'Audio only'
+
+
+def _pick_best(formats, key):
+    """Mengambil format dengan nilai key tertinggi, atau None jika kosong"""
+    return max(formats, key=key) if formats else None
+
+
+def resolve_format_plan(info, quality):
+    """Menentukan format yang akan diunduh dari daftar format yang tersedia
+
+    Meniru pemilihan format di HomeScreen.get_format_string (video mp4 +
+    audio m4a, dengan fallback ke format progresif mp4) tetapi menghasilkan
+    ID format yang eksplisit sehingga yt-dlp tidak perlu memilih lagi.
+
+    Args:
+        info (dict): Hasil extract_video_info
+        quality (str): Opsi kualitas dari UI ('Best', '720p', 'Audio only', ...)
+
+    Returns:
+        dict: {'format_id': '137+140', 'height': 1080, 'filesize': byte},
+              atau None jika tidak ada format yang cocok
+    """
+    formats = info.get('available_formats') or []
+    audio = [f for f in formats
+             if f.get('vcodec') == 'none' and f.get('acodec') not in ('', 'none')]
+    best_audio = _pick_best([f for f in audio if f.get('ext') == 'm4a'] or audio,
+                            key=lambda f: f.get('tbr') or 0)
+
+    if quality == AUDIO_ONLY:
+        if not best_audio:
+            return None
+        return {
+            'format_id': best_audio['format_id'],
+            'height': 0,
+            'filesize': best_audio.get('filesize') or 0
+        }
+
+    if quality not in QUALITY_HEIGHTS:
+        return None
+
+    max_height = QUALITY_HEIGHTS[quality]
+
+    def fits(f):
+        return f.get('ext') == 'mp4' and (max_height is None or (f.get('height') or 0) <= max_height)
+
+    def rank(f):
+        return (f.get('height') or 0, f.get('tbr') or 0)
+
+    video = _pick_best([f for f in formats
+                        if f.get('acodec') == 'none' and f.get('vcodec') not in ('', 'none') and fits(f)],
+                       key=rank)
+    if video and best_audio and best_audio.get('ext') == 'm4a':
+        return {
+            'format_id': f"{video['format_id']}+{best_audio['format_id']}",
+            'height': video.get('height') or 0,
+            'filesize': (video.get('filesize') or 0) + (best_audio.get('filesize') or 0)
+        }
+
+    progressive = _pick_best([f for f in formats
+                              if f.get('acodec') not in ('', 'none')
+                              and f.get('vcodec') not in ('', 'none') and fits(f)],
+                             key=rank)
+    if progressive:
+        return {
+            'format_id': progressive['format_id'],
+            'height': progressive.get('height') or 0,
+            'filesize': progressive.get('filesize') or 0
+        }
+    return None
+
+
+class MetadataPrefetcher:
+    """Mengambil metadata video secara spekulatif di background
+
+    Dipanggil ketika URL ditempel, sebelum pengguna menekan tombol apa pun.
+    Hasil ekstraksi disimpan dalam cache LRU bersama file info JSON mentah
+    (untuk --load-info-json) dan rencana format per kualitas.
+
+    Pekerjaan spekulatif dibatasi: maksimal max_inflight ekstraksi berjalan
+    bersamaan, dan ekstraksi tertua dibatalkan saat batas tercapai karena
+    pengguna kemungkinan sudah berpindah ke URL lain.
+
+    Attributes:
+        max_entries (int): Jumlah maksimum URL dalam cache
+        max_inflight (int): Jumlah maksimum ekstraksi spekulatif bersamaan
+        ttl (float): Umur cache dalam detik; URL format YouTube kedaluwarsa
+        warm_up (bool): Resolusi DNS host media lebih awal untuk kualitas Best
+    """
+
+    def __init__(self, max_entries=20, max_inflight=2, ttl=30 * 60, warm_up=True):
+        self.max_entries = max_entries
+        self.max_inflight = max_inflight
+        self.ttl = ttl
+        self.warm_up = warm_up
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._inflight = OrderedDict()
+        self._cache_dir = tempfile.mkdtemp(prefix='ytdl_prefetch_')
+        self._counters = {'started': 0, 'hits': 0, 'cancelled': 0, 'evicted': 0}
+
+    def prefetch(self, url):
+        """Memulai ekstraksi spekulatif untuk URL jika belum ada di cache
+
+        Args:
+            url (str): URL YouTube
+
+        Returns:
+            bool: True jika ekstraksi baru dimulai
+        """
+        if not check_valid_url(url):
+            return False
+
+        with self._lock:
+            if self._get_fresh_entry(url) is not None or url in self._inflight:
+                return False
+
+            # Batalkan pekerjaan spekulatif tertua jika batas tercapai
+            while len(self._inflight) >= self.max_inflight:
+                _, (old_cancel, _) = self._inflight.popitem(last=False)
+                old_cancel.set()
+                self._counters['cancelled'] += 1
+
+            cancel_event = threading.Event()
+            done_event = threading.Event()
+            self._inflight[url] = (cancel_event, done_event)
+            self._counters['started'] += 1
+
+        threading.Thread(
+            target=self._fetch,
+            args=(url, cancel_event, done_event),
+            daemon=True
+        ).start()
+        return True
+
+    def _fetch(self, url, cancel_event, done_event):
+        """Thread ekstraksi; menyimpan hasil ke cache jika tidak dibatalkan"""
+        info_json = os.path.join(self._cache_dir, f"{abs(hash(url))}_{time.time_ns()}.json")
+        try:
+            info = extract_video_info(url, cancel_event=cancel_event, info_json_path=info_json)
+
+            if info is None or cancel_event.is_set():
+                self._remove_file(info_json)
+                return
+
+            entry = {
+                'info': info,
+                'info_json': info_json,
+                'plans': {quality: resolve_format_plan(info, quality)
+                          for quality in list(QUALITY_HEIGHTS) + [AUDIO_ONLY]},
+                'fetched_at': time.time()
+            }
+
+            with self._lock:
+                self._cache[url] = entry
+                self._cache.move_to_end(url)
+                while len(self._cache) > self.max_entries:
+                    _, old = self._cache.popitem(last=False)
+                    self._remove_file(old['info_json'])
+                    self._counters['evicted'] += 1
+
+            if self.warm_up:
+                self._warm_up(info, entry['plans'].get('Best'))
+        finally:
+            with self._lock:
+                if self._inflight.get(url, (None, None))[1] is done_event:
+                    del self._inflight[url]
+            done_event.set()
+
+    def _warm_up(self, info, plan):
+        """Meresolusi DNS host media dari format yang direncanakan
+
+        yt-dlp berjalan di proses terpisah sehingga koneksi TCP/TLS tidak
+        dapat dipakai bersama; yang tersisa antar proses adalah cache DNS
+        sistem, jadi hanya itu yang dipanaskan.
+        """
+        if not plan:
+            return
+
+        format_ids = set(plan['format_id'].split('+'))
+        hosts = {f.get('host') for f in info.get('available_formats', [])
+                 if f.get('format_id') in format_ids and f.get('host')}
+        for host in hosts:
+            try:
+                socket.getaddrinfo(host, 443, type=socket.SOCK_STREAM)
+            except OSError:
+                pass  # Pemanasan bersifat opsional
+
+    def _get_fresh_entry(self, url):
+        """Mengambil entri cache yang belum kedaluwarsa (lock harus dipegang)"""
+        entry = self._cache.get(url)
+        if entry is None:
+            return None
+
+        if time.time() - entry['fetched_at'] > self.ttl:
+            del self._cache[url]
+            self._remove_file(entry['info_json'])
+            return None
+
+        self._cache.move_to_end(url)
+        return entry
+
+    def get(self, url):
+        """Mengambil metadata dari cache tanpa menunggu
+
+        Returns:
+            dict: Hasil extract_video_info, atau None jika belum tersedia
+        """
+        with self._lock:
+            entry = self._get_fresh_entry(url)
+            if entry is None:
+                return None
+            self._counters['hits'] += 1
+            return entry['info']
+
+    def fetch(self, url, timeout=None):
+        """Mengambil metadata, memakai hasil spekulatif jika ada
+
+        Jika ekstraksi untuk URL sedang berjalan, fungsi ini menunggunya
+        alih-alih memulai ekstraksi kedua.
+
+        Args:
+            url (str): URL YouTube
+            timeout (float, optional): Batas waktu menunggu dalam detik
+
+        Returns:
+            dict: Hasil extract_video_info, atau None jika gagal
+        """
+        info = self.get(url)
+        if info is not None:
+            return info
+
+        self.prefetch(url)
+        with self._lock:
+            pending = self._inflight.get(url)
+        if pending is not None:
+            pending[1].wait(timeout)
+        return self.get(url)
+
+    def get_format_plan(self, url, quality):
+        """Mendapatkan rencana format yang sudah diresolusi untuk URL
+
+        Returns:
+            dict: Hasil resolve_format_plan, atau None jika belum tersedia
+        """
+        with self._lock:
+            entry = self._get_fresh_entry(url)
+            return entry['plans'].get(quality) if entry else None
+
+    def get_info_json(self, url):
+        """Mendapatkan path file info JSON untuk --load-info-json
+
+        Returns:
+            str: Path file, atau None jika belum tersedia
+        """
+        with self._lock:
+            entry = self._get_fresh_entry(url)
+            return entry['info_json'] if entry else None
+
+    def cancel_others(self, url):
+        """Membatalkan semua ekstraksi spekulatif kecuali untuk URL ini"""
+        with self._lock:
+            for other in [u for u in self._inflight if u != url]:
+                cancel_event, _ = self._inflight.pop(other)
+                cancel_event.set()
+                self._counters['cancelled'] += 1
+
+    def get_counters(self):
+        """Mendapatkan statistik pekerjaan spekulatif
+
+        Returns:
+            dict: Jumlah ekstraksi 'started', cache 'hits', 'cancelled' dan 'evicted'
+        """
+        with self._lock:
+            return dict(self._counters)
+
+    def close(self):
+        """Membatalkan semua ekstraksi dan menghapus file cache"""
+        with self._lock:
+            for cancel_event, _ in self._inflight.values():
+                cancel_event.set()
+            self._inflight.clear()
+            self._cache.clear()
+        shutil.rmtree(self._cache_dir, ignore_errors=True)
+
+    @staticmethod
+    def _remove_file(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,238 @@
+import re
+import time
+import random
+import threading
+
+# Kelas error yang dikenali dari output yt-dlp
+ERROR_HTTP_403 = 'http_403'
+ERROR_HTTP_429 = 'http_429'
+ERROR_TIMEOUT = 'timeout'
+ERROR_THROTTLED = 'throttled'
+ERROR_NETWORK = 'network'
+ERROR_EXTRACTOR = 'extractor'
+ERROR_UNAVAILABLE = 'unavailable'
+ERROR_UNKNOWN = 'unknown'
+
+ERROR_CLASSES = (
+    ERROR_HTTP_403,
+    ERROR_HTTP_429,
+    ERROR_TIMEOUT,
+    ERROR_THROTTLED,
+    ERROR_NETWORK,
+    ERROR_EXTRACTOR,
+    ERROR_UNAVAILABLE,
+    ERROR_UNKNOWN,
+)
+
+# Pola dicocokkan berurutan; pola yang lebih spesifik harus di atas
+_ERROR_PATTERNS = [
+    (ERROR_UNAVAILABLE, re.compile(
+        r'video unavailable|private video|has been removed|'
+        r'not available in your country|members-only|sign in to confirm your age',
+        re.IGNORECASE)),
+    (ERROR_HTTP_429, re.compile(r'HTTP Error 429|Too Many Requests', re.IGNORECASE)),
+    (ERROR_HTTP_403, re.compile(r'HTTP Error 403|Forbidden', re.IGNORECASE)),
+    (ERROR_THROTTLED, re.compile(r'throttl|rate.?limit', re.IGNORECASE)),
+    (ERROR_TIMEOUT, re.compile(r'timed? ?out|timeout', re.IGNORECASE)),
+    (ERROR_NETWORK, re.compile(
+        r'connection (reset|refused|aborted)|network is unreachable|'
+        r'temporary failure in name resolution|getaddrinfo failed|'
+        r'IncompleteRead|RemoteDisconnected|Unable to download webpage',
+        re.IGNORECASE)),
+    (ERROR_EXTRACTOR, re.compile(r'ERROR: \[[\w:]+\]|ExtractorError|Unable to extract', re.IGNORECASE)),
+]
+
+# Baris yang memuat judul atau nama file video; judul bebas berisi kata
+# seperti "Members-only" atau "Forbidden" sehingga tidak boleh diklasifikasi
+_FILENAME_LINE = re.compile(
+    r'Destination:|^\[Merger\]|has already been downloaded|'
+    r'^\[info\] Writing|Deleting original file|^\[MoveFiles\]')
+
+# Kelas error yang tidak akan berhasil walaupun diulang
+_FATAL_CLASSES = {ERROR_UNAVAILABLE}
+
+
+def classify_error(output):
+    """Mengklasifikasikan error berdasarkan output yt-dlp
+
+    Hanya baris "ERROR:" yang diperiksa jika ada; baris lain (mis. WARNING
+    throttling nsig yang sering muncul) dipakai hanya jika yt-dlp tidak
+    menulis baris ERROR. Baris yang memuat judul atau nama file tidak
+    pernah diperiksa.
+
+    Args:
+        output (str atau list): Output yt-dlp (teks penuh atau daftar baris)
+
+    Returns:
+        str: Salah satu nilai dari ERROR_CLASSES
+    """
+    if not output:
+        return ERROR_UNKNOWN
+
+    lines = output.splitlines() if isinstance(output, str) else list(output)
+    lines = [line.strip() for line in lines]
+    relevant = [line for line in lines if line.startswith('ERROR:')]
+    if not relevant:
+        relevant = [line for line in lines if line and not _FILENAME_LINE.search(line)]
+    text = '\n'.join(relevant)
+
+    for error_class, pattern in _ERROR_PATTERNS:
+        if pattern.search(text):
+            return error_class
+
+    return ERROR_UNKNOWN
+
+
+class RetryPolicy:
+    """Kebijakan pengulangan dengan exponential backoff dan jitter
+
+    Attributes:
+        max_attempts (int): Jumlah percobaan maksimum (termasuk percobaan pertama)
+        base_delay (float): Jeda dasar dalam detik
+        max_delay (float): Jeda maksimum dalam detik
+    """
+
+    # Pengali jeda untuk kelas error yang menandakan server ingin kita melambat
+    SLOWDOWN_FACTORS = {
+        ERROR_HTTP_429: 4.0,
+        ERROR_THROTTLED: 2.0,
+    }
+
+    def __init__(self, max_attempts=5, base_delay=1.0, max_delay=60.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def should_retry(self, error_class, attempt):
+        """Menentukan apakah percobaan berikutnya perlu dilakukan
+
+        Args:
+            error_class (str): Kelas error dari classify_error
+            attempt (int): Nomor percobaan yang baru saja gagal (mulai dari 1)
+
+        Returns:
+            bool: True jika unduhan perlu diulang
+        """
+        if error_class in _FATAL_CLASSES:
+            return False
+        return attempt < self.max_attempts
+
+    def get_delay(self, error_class, attempt):
+        """Menghitung jeda sebelum percobaan berikutnya
+
+        Menggunakan "full jitter": jeda acak antara 0 dan batas eksponensial,
+        sehingga banyak klien yang gagal bersamaan tidak mencoba ulang serentak.
+
+        Args:
+            error_class (str): Kelas error dari classify_error
+            attempt (int): Nomor percobaan yang baru saja gagal (mulai dari 1)
+
+        Returns:
+            float: Jeda dalam detik
+        """
+        factor = self.SLOWDOWN_FACTORS.get(error_class, 1.0)
+        ceiling = min(self.max_delay, self.base_delay * factor * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+    def sleep(self, error_class, attempt):
+        """Menunggu sesuai jeda backoff
+
+        Returns:
+            float: Jeda yang digunakan dalam detik
+        """
+        delay = self.get_delay(error_class, attempt)
+        time.sleep(delay)
+        return delay
+
+
+class ConnectionHealth:
+    """Melacak kesehatan koneksi dan menyesuaikan parameter unduhan
+
+    Saat jaringan memburuk, jumlah fragmen paralel dan ukuran chunk HTTP
+    diturunkan; setelah beberapa unduhan berhasil berturut-turut keduanya
+    dinaikkan kembali secara bertahap. Objek ini aman dipakai dari banyak thread.
+
+    Attributes:
+        concurrency (int): Jumlah fragmen yang diunduh paralel
+        chunk_size (int): Ukuran chunk HTTP dalam byte
+    """
+
+    MIN_CONCURRENCY = 1
+    MAX_CONCURRENCY = 8
+    MIN_CHUNK_SIZE = 256 * 1024
+    MAX_CHUNK_SIZE = 10 * 1024 * 1024
+
+    # Jumlah keberhasilan berturut-turut sebelum parameter dinaikkan
+    RECOVERY_STREAK = 3
+
+    # Kelas error yang tidak berkaitan dengan kualitas jaringan; 403 biasanya
+    # berarti URL format kedaluwarsa atau ditolak, bukan jaringan yang lambat
+    _NON_NETWORK_CLASSES = {ERROR_HTTP_403, ERROR_EXTRACTOR, ERROR_UNAVAILABLE, ERROR_UNKNOWN}
+
+    def __init__(self, concurrency=4, chunk_size=4 * 1024 * 1024):
+        self._lock = threading.Lock()
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+        self._success_streak = 0
+        self._counters = {error_class: 0 for error_class in ERROR_CLASSES}
+        self._counters['retries'] = 0
+        self._counters['successes'] = 0
+
+    def record_failure(self, error_class):
+        """Mencatat kegagalan dan menurunkan parameter jika jaringan bermasalah
+
+        Args:
+            error_class (str): Kelas error dari classify_error
+        """
+        with self._lock:
+            self._counters[error_class] = self._counters.get(error_class, 0) + 1
+            self._success_streak = 0
+
+            if error_class in self._NON_NETWORK_CLASSES:
+                return
+
+            self.concurrency = max(self.MIN_CONCURRENCY, self.concurrency // 2)
+            self.chunk_size = max(self.MIN_CHUNK_SIZE, self.chunk_size // 2)
+
+    def record_retry(self):
+        """Mencatat bahwa sebuah percobaan ulang dilakukan"""
+        with self._lock:
+            self._counters['retries'] += 1
+
+    def record_success(self):
+        """Mencatat keberhasilan dan menaikkan parameter setelah pulih"""
+        with self._lock:
+            self._counters['successes'] += 1
+            self._success_streak += 1
+
+            if self._success_streak < self.RECOVERY_STREAK:
+                return
+
+            self._success_streak = 0
+            self.concurrency = min(self.MAX_CONCURRENCY, self.concurrency + 1)
+            self.chunk_size = min(self.MAX_CHUNK_SIZE, self.chunk_size * 2)
+
+    def get_download_args(self):
+        """Mendapatkan argumen yt-dlp sesuai kondisi jaringan saat ini
+
+        Returns:
+            list: Argumen baris perintah untuk yt-dlp
+        """
+        with self._lock:
+            return [
+                '--concurrent-fragments', str(self.concurrency),
+                '--http-chunk-size', str(self.chunk_size),
+            ]
+
+    def get_counters(self):
+        """Mendapatkan salinan penghitung per kelas error
+
+        Returns:
+            dict: Jumlah kejadian per kelas error, ditambah 'retries' dan 'successes'
+        """
+        with self._lock:
+            return dict(self._counters)
+
+
+# Instance bersama untuk seluruh aplikasi
+connection_health = ConnectionHealth()
@@ -0,0 +1,756 @@
+import os
+import sys
+import copy
+import json
+import queue
+import argparse
+import threading
+import subprocess
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlparse
+
+from utils import download_video, extract_video_id, get_download_dir
+from download_history import DownloadHistory
+
+# Jenis langganan: channel mengurutkan video dari yang terbaru,
+# playlist dari yang terlama
+KIND_CHANNEL = 'channel'
+KIND_PLAYLIST = 'playlist'
+
+# Awalan path URL channel YouTube
+CHANNEL_PATH_PREFIXES = ('channel', 'c', 'user')
+
+# Tab channel yang berisi daftar video; tanpa tab, yt-dlp mengembalikan
+# tab-tab channel (Videos, Shorts, Live) sebagai entri, bukan video
+CHANNEL_VIDEO_TABS = ('videos', 'shorts', 'streams')
+
+# Playlist unggahan channel (UU..., termasuk UUSH/UULF/UULV) terurut dari
+# yang terbaru seperti channel
+UPLOADS_PLAYLIST_PREFIX = 'UU'
+
+# Jumlah ID video terbaru yang diingat per langganan untuk menghentikan
+# enumerasi channel dan menyaring duplikat
+SEEN_IDS_LIMIT = 500
+
+# Jumlah pemeriksaan yang mencoba ulang unduhan gagal sebelum video dilewati
+MAX_DOWNLOAD_ATTEMPTS = 5
+
+
+def is_subscription_url(url):
+    """Memeriksa apakah URL menunjuk ke channel atau playlist YouTube
+
+    Args:
+        url (str): URL yang diperiksa
+
+    Returns:
+        bool: True untuk URL playlist (list=) atau channel (@nama, channel/, c/, user/)
+    """
+    if not url or not isinstance(url, str):
+        return False
+
+    parsed = urlparse(url if '://' in url else 'https://' + url)
+    host = (parsed.hostname or '').lower()
+    if host.split('.')[-2:-1] != ['youtube']:
+        return False
+
+    if parse_qs(parsed.query).get('list'):
+        return True
+
+    path_parts = [p for p in parsed.path.split('/') if p]
+    if not path_parts:
+        return False
+    if path_parts[0].startswith('@'):
+        return True
+    return len(path_parts) >= 2 and path_parts[0] in CHANNEL_PATH_PREFIXES
+
+
+def normalize_subscription_url(url):
+    """Mengarahkan URL channel ke tab videonya
+
+    https://www.youtube.com/@nama, /channel/ID, /c/nama dan /user/nama
+    (dengan atau tanpa tab lain seperti /featured) menjadi .../videos.
+    Tab /shorts dan /streams dibiarkan. URL playlist tidak diubah.
+
+    Args:
+        url (str): URL channel atau playlist YouTube
+
+    Returns:
+        str: URL yang siap dienumerasi yt-dlp
+    """
+    parsed = urlparse(url if '://' in url else 'https://' + url)
+    if parse_qs(parsed.query).get('list'):
+        return url
+
+    path_parts = [p for p in parsed.path.split('/') if p]
+    if path_parts and path_parts[0].startswith('@'):
+        root, rest = path_parts[:1], path_parts[1:]
+    elif len(path_parts) >= 2 and path_parts[0] in CHANNEL_PATH_PREFIXES:
+        root, rest = path_parts[:2], path_parts[2:]
+    else:
+        return url
+
+    tab = rest[0] if rest and rest[0] in CHANNEL_VIDEO_TABS else 'videos'
+    return f"https://www.youtube.com/{'/'.join(root)}/{tab}"
+
+
+def detect_kind(url):
+    """Menentukan jenis langganan dari URL
+
+    Args:
+        url (str): URL channel atau playlist YouTube
+
+    Returns:
+        str: KIND_PLAYLIST untuk playlist biasa; KIND_CHANNEL untuk channel
+             dan playlist unggahan channel (list=UU...) yang terurut dari
+             yang terbaru
+    """
+    parsed = urlparse(url if '://' in url else 'https://' + url)
+    list_id = parse_qs(parsed.query).get('list', [''])[0]
+    if list_id and not list_id.startswith(UPLOADS_PLAYLIST_PREFIX):
+        return KIND_PLAYLIST
+    return KIND_CHANNEL
+
+
+def list_new_entries(subscription, max_entries=50, cancel_event=None):
+    """Mengambil video baru dari channel atau playlist secara inkremental
+
+    Untuk channel, daftar video dibaca dari yang terbaru dan proses yt-dlp
+    dihentikan begitu bertemu ID mana pun yang sudah dikenal (seen_ids atau
+    pending), sehingga video terakhir yang dihapus atau dijadikan privat
+    tidak membuat seluruh jendela tampak baru. Untuk playlist, enumerasi
+    dimulai setelah jumlah item yang sudah dilihat; pemeriksaan pertama
+    membaca playlist sampai habis agar seen_count mencatat jumlah item
+    sebenarnya. ID yang sudah dikenal selalu dilewati. Keduanya memakai
+    --flat-playlist sehingga halaman video tidak diekstrak.
+
+    Args:
+        subscription (dict): Entri dari SubscriptionStore
+        max_entries (int, optional): Batas jumlah item yang dibaca (tidak
+            berlaku untuk pemeriksaan pertama playlist)
+        cancel_event (threading.Event, optional): Menghentikan enumerasi jika di-set
+
+    Returns:
+        tuple: (entries, scanned) - entries adalah dict {'id', 'url', 'title'}
+               yang belum dikenal, dari yang terbaru; scanned adalah jumlah
+               item yang dibaca. None jika gagal
+    """
+    # Channel selalu dibaca dari awal; playlist dilanjutkan setelah item terakhir
+    start = 1
+    read_to_end = False
+    if subscription['kind'] == KIND_PLAYLIST:
+        start = subscription.get('seen_count', 0) + 1
+        read_to_end = subscription.get('last_checked') is None
+
+    cmd = [
+        'yt-dlp',
+        '--flat-playlist',
+        '--dump-json',
+        '--lazy-playlist',
+        '--playlist-start', str(start),
+    ]
+    if not read_to_end:
+        cmd.extend(['--playlist-end', str(start + max_entries - 1)])
+    cmd.append(subscription['url'])
+
+    known_ids = set(subscription.get('seen_ids', []))
+    known_ids.update(entry['id'] for entry in subscription.get('pending', []))
+
+    entries = []
+    scanned = 0
+    process = None
+    try:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        for line in process.stdout:
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+
+            line = line.strip()
+            if not line.startswith('{'):
+                continue
+
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"Error parsing JSON: {e}")
+                continue
+
+            video_id = item.get('id')
+            if not video_id:
+                continue
+            scanned += 1
+
+            if video_id in known_ids:
+                # Channel: sisa daftar sudah pernah dilihat
+                if subscription['kind'] == KIND_CHANNEL:
+                    break
+                continue
+
+            entries.append({
+                'id': video_id,
+                'url': item.get('url') or f"https://www.youtube.com/watch?v={video_id}",
+                'title': item.get('title', '')
+            })
+        else:
+            if process.wait() != 0 and not entries:
+                print(f"yt-dlp gagal memeriksa langganan: {subscription['url']}")
+                return None
+    except Exception as e:
+        print(f"Error memeriksa langganan: {e}")
+        return None
+    finally:
+        # Hentikan proses jika enumerasi berhenti lebih awal
+        if process is not None and process.poll() is None:
+            process.terminate()
+            process.wait()
+
+    if subscription['kind'] == KIND_PLAYLIST:
+        # Playlist terurut dari yang terlama; samakan dengan channel
+        entries.reverse()
+    return entries, scanned
+
+
+def _remember_ids(seen_ids, new_ids):
+    """Menambahkan ID ke depan daftar seen_ids dan membuang yang terlama"""
+    new_ids = list(dict.fromkeys(new_ids))[:SEEN_IDS_LIMIT]
+    added = set(new_ids)
+    return (new_ids + [video_id for video_id in seen_ids if video_id not in added])[:SEEN_IDS_LIMIT]
+
+
+class SubscriptionStore:
+    """Menyimpan daftar channel dan playlist yang dilanggan
+
+    Disimpan sebagai file JSON di direktori data yang sama dengan riwayat
+    unduhan. Setiap langganan menyimpan penanda posisi: seen_ids (ID video
+    terbaru yang sudah diunduh atau sengaja dilewati) dan, untuk playlist,
+    seen_count. Video baru disimpan di pending sampai berhasil diunduh,
+    sehingga unduhan yang gagal atau belum sempat berjalan saat aplikasi
+    ditutup diantrekan lagi pada pemeriksaan berikutnya.
+
+    Attributes:
+        subscriptions_file (str): Path file JSON langganan
+    """
+
+    def __init__(self, data_dir):
+        """Memuat langganan dari disk
+
+        Args:
+            data_dir (str): Direktori data aplikasi
+        """
+        self.subscriptions_file = os.path.join(data_dir, 'subscriptions.json')
+        self._lock = threading.Lock()
+        self._subscriptions = self._load()
+        if any([self._upgrade(subscription) for subscription in self._subscriptions]):
+            self._save()
+
+    def _load(self):
+        """Memuat langganan dari file
+
+        Returns:
+            list: Daftar langganan, kosong jika tidak ada file atau terjadi error
+        """
+        if not os.path.exists(self.subscriptions_file):
+            return []
+
+        try:
+            with open(self.subscriptions_file, 'r') as f:
+                data = json.load(f)
+                if not isinstance(data, list):
+                    print("Format file langganan tidak valid, membuat daftar baru")
+                    return []
+                return data
+        except Exception as e:
+            print(f"Error memuat langganan: {e}")
+            return []
+
+    @staticmethod
+    def _upgrade(subscription):
+        """Melengkapi kolom langganan yang disimpan versi sebelumnya
+
+        Jika URL atau jenis langganan berubah karena aturan normalisasi,
+        penanda posisi lama tidak dapat dipakai; pemeriksaan berikutnya
+        diperlakukan sebagai pemeriksaan pertama.
+
+        Returns:
+            bool: True jika langganan diubah dan perlu disimpan
+        """
+        changed = False
+        if 'last_seen_id' in subscription:
+            last_seen_id = subscription.pop('last_seen_id')
+            subscription.setdefault('seen_ids', [last_seen_id] if last_seen_id else [])
+            changed = True
+        for key, default in (('seen_ids', []), ('pending', []), ('seen_count', 0)):
+            if key not in subscription:
+                subscription[key] = default
+                changed = True
+
+        url = normalize_subscription_url(subscription['url'])
+        kind = detect_kind(url)
+        if url != subscription['url'] or kind != subscription.get('kind'):
+            subscription.update(url=url, kind=kind, seen_count=0, last_checked=None)
+            changed = True
+        return changed
+
+    def _find(self, url):
+        for subscription in self._subscriptions:
+            if subscription['url'] == url:
+                return subscription
+        return None
+
+    def _save(self):
+        """Menyimpan langganan ke file secara atomik"""
+        try:
+            tmp_file = self.subscriptions_file + '.tmp'
+            with open(tmp_file, 'w') as f:
+                json.dump(self._subscriptions, f, indent=2)
+            os.replace(tmp_file, self.subscriptions_file)
+        except Exception as e:
+            print(f"Error menyimpan langganan: {e}")
+
+    def add(self, url, title=''):
+        """Menambahkan langganan baru
+
+        URL channel dinormalisasi ke tab videonya.
+
+        Args:
+            url (str): URL channel atau playlist
+            title (str, optional): Nama yang ditampilkan
+
+        Returns:
+            dict: Langganan yang ditambahkan, atau yang sudah ada untuk URL ini
+        """
+        url = normalize_subscription_url(url)
+        with self._lock:
+            subscription = self._find(url)
+            if subscription is not None:
+                return dict(subscription)
+
+            subscription = {
+                'url': url,
+                'title': title,
+                'kind': detect_kind(url),
+                'seen_ids': [],
+                'pending': [],
+                'seen_count': 0,
+                'last_checked': None,
+                'added': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            }
+            self._subscriptions.append(subscription)
+            self._save()
+            return dict(subscription)
+
+    def remove(self, url):
+        """Menghapus langganan
+
+        Returns:
+            bool: True jika langganan dihapus, False jika tidak ditemukan
+        """
+        url = normalize_subscription_url(url)
+        with self._lock:
+            old_count = len(self._subscriptions)
+            self._subscriptions = [s for s in self._subscriptions if s['url'] != url]
+            if old_count != len(self._subscriptions):
+                self._save()
+                return True
+            return False
+
+    def get_subscriptions(self):
+        """Mendapatkan salinan semua langganan
+
+        Returns:
+            list: Daftar dict langganan
+        """
+        with self._lock:
+            return copy.deepcopy(self._subscriptions)
+
+    def get_pending(self, url):
+        """Mendapatkan video langganan yang belum berhasil diunduh
+
+        Returns:
+            list: Dict {'id', 'url', 'title', 'attempts'} dari yang terlama
+        """
+        with self._lock:
+            subscription = self._find(url)
+            if subscription is None:
+                return []
+            return [dict(entry) for entry in subscription['pending']]
+
+    def record_check(self, url, new_entries, skipped_ids, **fields):
+        """Mencatat hasil pemeriksaan dalam satu penyimpanan
+
+        Args:
+            url (str): URL langganan
+            new_entries (list): Video baru dari yang terbaru; masuk pending
+            skipped_ids (list): ID yang sengaja tidak diunduh (mis. saat
+                pemeriksaan pertama); langsung masuk seen_ids
+            **fields: Kolom lain yang diperbarui
+        """
+        with self._lock:
+            subscription = self._find(url)
+            if subscription is None:
+                return
+
+            pending_ids = {entry['id'] for entry in subscription['pending']}
+            for entry in reversed(new_entries):
+                if entry['id'] not in pending_ids:
+                    subscription['pending'].append({
+                        'id': entry['id'],
+                        'url': entry['url'],
+                        'title': entry['title'],
+                        'attempts': 0
+                    })
+            subscription['seen_ids'] = _remember_ids(subscription['seen_ids'], skipped_ids)
+            subscription.update(fields)
+            self._save()
+
+    def mark_downloaded(self, url, video_id):
+        """Memindahkan video dari pending ke seen_ids setelah tercatat di riwayat"""
+        with self._lock:
+            subscription = self._find(url)
+            if subscription is None:
+                return
+
+            subscription['pending'] = [e for e in subscription['pending'] if e['id'] != video_id]
+            subscription['seen_ids'] = _remember_ids(subscription['seen_ids'], [video_id])
+            self._save()
+
+    def mark_failed(self, url, video_id, max_attempts=MAX_DOWNLOAD_ATTEMPTS):
+        """Mencatat unduhan yang gagal
+
+        Video tetap di pending sampai gagal max_attempts kali, lalu dilewati.
+
+        Returns:
+            bool: True jika video dilewati dan tidak akan dicoba lagi
+        """
+        with self._lock:
+            subscription = self._find(url)
+            if subscription is None:
+                return False
+
+            for entry in subscription['pending']:
+                if entry['id'] == video_id:
+                    entry['attempts'] = entry.get('attempts', 0) + 1
+                    if entry['attempts'] < max_attempts:
+                        self._save()
+                        return False
+                    break
+            else:
+                return False
+
+        self.mark_downloaded(url, video_id)
+        return True
+
+    def update(self, url, **fields):
+        """Memperbarui kolom langganan dan menyimpannya
+
+        Args:
+            url (str): URL langganan
+            **fields: Kolom yang diperbarui
+        """
+        with self._lock:
+            subscription = self._find(url)
+            if subscription is not None:
+                subscription.update(fields)
+                self._save()
+
+
+class SubscriptionScheduler:
+    """Memeriksa langganan secara berkala dan mengunduh video baru
+
+    Berjalan di thread background sendiri, bukan di Clock Kivy. Pemeriksaan
+    hanya dilakukan di dalam jendela waktu yang diizinkan; video baru masuk
+    antrean yang dikerjakan oleh sejumlah thread pengunduh.
+
+    Attributes:
+        interval (float): Jeda antar pemeriksaan dalam detik
+        windows (list): Daftar (jam_mulai, jam_selesai) yang diizinkan;
+            kosong berarti kapan saja. Jendela boleh melewati tengah malam,
+            mis. (22, 6)
+        concurrency (int): Jumlah unduhan paralel
+        initial_backfill (int): Jumlah video lama yang diunduh saat langganan
+            pertama kali diperiksa
+    """
+
+    def __init__(self, store, history, download_dir, format_string,
+                 interval=6 * 60 * 60, windows=None, concurrency=1,
+                 initial_backfill=0, max_entries=50):
+        self.store = store
+        self.history = history
+        self.download_dir = download_dir
+        self.format_string = format_string
+        self.interval = interval
+        self.windows = windows or []
+        self.concurrency = concurrency
+        self.initial_backfill = initial_backfill
+        self.max_entries = max_entries
+
+        self._queue = queue.Queue()
+        self._queued_ids = set()
+        self._queued_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._force_check = False
+        self._threads = []
+
+    def start(self):
+        """Memulai thread penjadwal dan thread pengunduh"""
+        if self._threads:
+            return
+
+        self._stop_event.clear()
+        self._threads.append(threading.Thread(target=self._run, daemon=True))
+        for _ in range(self.concurrency):
+            self._threads.append(threading.Thread(target=self._download_worker, daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=None):
+        """Menghentikan penjadwal; unduhan yang sedang berjalan diselesaikan
+
+        Args:
+            timeout (float, optional): Batas waktu menunggu tiap thread
+        """
+        self._stop_event.set()
+        self._wake_event.set()
+        for _ in range(self.concurrency):
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def check_now(self):
+        """Meminta pemeriksaan segera tanpa menunggu interval maupun jendela"""
+        self._force_check = True
+        self._wake_event.set()
+
+    def in_window(self, now=None):
+        """Memeriksa apakah waktu saat ini berada di jendela yang diizinkan
+
+        Args:
+            now (datetime, optional): Waktu yang diperiksa, default sekarang
+
+        Returns:
+            bool: True jika pemeriksaan boleh dilakukan
+        """
+        if not self.windows:
+            return True
+
+        hour = (now or datetime.now()).hour
+        for start, end in self.windows:
+            if start <= end and start <= hour < end:
+                return True
+            if start > end and (hour >= start or hour < end):
+                return True
+        return False
+
+    def seconds_until_window(self, now=None):
+        """Menghitung waktu sampai jendela berikutnya dibuka
+
+        Args:
+            now (datetime, optional): Waktu acuan, default sekarang
+
+        Returns:
+            float: Detik sampai jendela terdekat dibuka, 0 jika sedang di dalam jendela
+        """
+        now = now or datetime.now()
+        if self.in_window(now):
+            return 0
+
+        waits = []
+        for start, _ in self.windows:
+            opens = now.replace(hour=start, minute=0, second=0, microsecond=0)
+            if opens <= now:
+                opens += timedelta(days=1)
+            waits.append((opens - now).total_seconds())
+        return min(waits)
+
+    def _run(self):
+        """Loop penjadwal"""
+        while not self._stop_event.is_set():
+            if self.in_window() or self._force_check:
+                self._force_check = False
+                self.check_all()
+                timeout = self.interval
+            else:
+                # Bangun saat jendela dibuka, bukan setelah interval penuh
+                timeout = min(self.interval, self.seconds_until_window())
+
+            self._wake_event.wait(timeout)
+            self._wake_event.clear()
+
+    def check_all(self):
+        """Memeriksa semua langganan dan mengantrekan video baru
+
+        Returns:
+            int: Jumlah video yang masuk antrean
+        """
+        queued = 0
+        for subscription in self.store.get_subscriptions():
+            if self._stop_event.is_set():
+                break
+            queued += self.check_subscription(subscription)
+        return queued
+
+    def sync_once(self):
+        """Memeriksa semua langganan lalu mengunduh video baru di thread pemanggil
+
+        Dipakai saat penjadwal tidak dijalankan, mis. dari baris perintah.
+
+        Returns:
+            int: Jumlah video yang masuk antrean
+        """
+        queued = self.check_all()
+        while not self._stop_event.is_set():
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._download_entry(entry)
+        return queued
+
+    def check_subscription(self, subscription):
+        """Memeriksa satu langganan
+
+        Video baru dicatat di pending lebih dulu; seen_ids baru diperbarui
+        setelah unduhan tercatat di riwayat. Video pending dari pemeriksaan
+        sebelumnya ikut diantrekan lagi.
+
+        Args:
+            subscription (dict): Entri dari SubscriptionStore
+
+        Returns:
+            int: Jumlah video yang masuk antrean
+        """
+        first_check = subscription.get('last_checked') is None
+        result = list_new_entries(subscription, self.max_entries, self._stop_event)
+        if result is None:
+            return self._enqueue_pending(subscription['url'])
+        entries, scanned = result
+
+        # Pemeriksaan pertama hanya mencatat posisi, kecuali backfill diminta
+        skipped = []
+        if first_check:
+            entries, skipped = entries[:self.initial_backfill], entries[self.initial_backfill:]
+
+        fields = {'last_checked': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+        if subscription['kind'] == KIND_PLAYLIST:
+            fields['seen_count'] = subscription.get('seen_count', 0) + scanned
+        self.store.record_check(subscription['url'], entries, [e['id'] for e in skipped], **fields)
+
+        return self._enqueue_pending(subscription['url'])
+
+    def _enqueue_pending(self, subscription_url):
+        """Mengantrekan video pending dari yang terlama
+
+        Returns:
+            int: Jumlah video yang masuk antrean
+        """
+        queued = 0
+        for entry in self.store.get_pending(subscription_url):
+            if self.history.has_video(entry['url']):
+                self.store.mark_downloaded(subscription_url, entry['id'])
+                continue
+            entry['subscription'] = subscription_url
+            if self._enqueue(entry):
+                queued += 1
+        return queued
+
+    def _enqueue(self, entry):
+        """Mengantrekan video jika belum ada di antrean"""
+        video_id = extract_video_id(entry['url']) or entry['id']
+        with self._queued_lock:
+            if video_id in self._queued_ids:
+                return False
+            self._queued_ids.add(video_id)
+
+        self._queue.put(entry)
+        return True
+
+    def _download_worker(self):
+        """Thread pengunduh yang mengambil video dari antrean"""
+        while True:
+            entry = self._queue.get()
+            if entry is None or self._stop_event.is_set():
+                return
+            self._download_entry(entry)
+
+    def _download_entry(self, entry):
+        """Mengunduh satu video dari antrean dan mencatatnya di riwayat"""
+        try:
+            info, filepath = download_video(entry['url'], self.download_dir, self.format_string)
+            if info and filepath:
+                self.history.add_download(
+                    title=info.get('title', entry['title']),
+                    url=entry['url'],
+                    filepath=filepath,
+                    thumbnail=info.get('thumbnail', ''),
+                    uploader=info.get('uploader', '')
+                )
+                self.store.mark_downloaded(entry['subscription'], entry['id'])
+            elif self.store.mark_failed(entry['subscription'], entry['id']):
+                print(f"Video langganan dilewati setelah {MAX_DOWNLOAD_ATTEMPTS} kali gagal: {entry['url']}")
+            else:
+                print(f"Gagal mengunduh video langganan, dicoba lagi nanti: {entry['url']}")
+        finally:
+            with self._queued_lock:
+                self._queued_ids.discard(extract_video_id(entry['url']) or entry['id'])
+
+
+def main(argv=None):
+    """Titik masuk baris perintah untuk mengelola langganan"""
+    parser = argparse.ArgumentParser(description="Mengelola langganan channel dan playlist")
+    parser.add_argument('--data-dir', help="Direktori DownloadHistory")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    add_parser = subparsers.add_parser('add', help="Menambahkan langganan")
+    add_parser.add_argument('url')
+    add_parser.add_argument('--title', default='')
+
+    remove_parser = subparsers.add_parser('remove', help="Menghapus langganan")
+    remove_parser.add_argument('url')
+
+    subparsers.add_parser('list', help="Menampilkan semua langganan")
+
+    check_parser = subparsers.add_parser('check', help="Memeriksa langganan dan mengunduh video baru")
+    check_parser.add_argument('--format', default='best')
+    check_parser.add_argument('--download-dir')
+    check_parser.add_argument('--backfill', type=int, default=0,
+                              help="Jumlah video lama yang diunduh untuk langganan baru")
+
+    args = parser.parse_args(argv)
+
+    history = DownloadHistory(args.data_dir)
+    store = SubscriptionStore(history.data_dir)
+
+    if args.command == 'add':
+        if not is_subscription_url(args.url):
+            print(f"Bukan URL channel atau playlist YouTube: {args.url}")
+            return 1
+        subscription = store.add(args.url, args.title)
+        print(f"Berlangganan {subscription['kind']}: {subscription['url']}")
+        return 0
+
+    if args.command == 'remove':
+        if not store.remove(args.url):
+            print(f"Langganan tidak ditemukan: {args.url}")
+            return 1
+        return 0
+
+    if args.command == 'list':
+        for subscription in store.get_subscriptions():
+            print(f"{subscription['kind']:8} {subscription['last_checked'] or '-':19} "
+                  f"{len(subscription['pending']):>3} pending  {subscription['url']}")
+        return 0
+
+    scheduler = SubscriptionScheduler(
+        store,
+        history,
+        args.download_dir or get_download_dir(),
+        args.format,
+        initial_backfill=args.backfill
+    )
+    print(f"{scheduler.sync_once()} video baru diantrekan")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
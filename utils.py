@@ -4,7 +4,30 @@ import time
 import subprocess
 import json
 import tempfile
+from collections import deque
 from datetime import datetime
+from urllib.parse import parse_qs, urlparse
+
+from retry import ERROR_HTTP_403, RetryPolicy, classify_error, connection_health
+
+# Batas waktu soket (detik) agar koneksi yang macet cepat terdeteksi
+SOCKET_TIMEOUT = 30
+
+# Interval (detik) pemeriksaan pembatalan saat menunggu yt-dlp
+CANCEL_POLL_INTERVAL = 0.2
+
+# Jumlah baris output non-progres yang disimpan untuk klasifikasi error
+ERROR_TAIL_LINES = 30
+
+# ID video YouTube dan awalan path yang memuatnya (/shorts/ID dst.)
+VIDEO_ID_REGEX = r'[A-Za-z0-9_-]{11}'
+VIDEO_PATH_PREFIXES = ('shorts', 'embed', 'v', 'live')
+
+# Format URL video YouTube
+YOUTUBE_REGEX = (
+    r'(https?://)?(www\.)?'
+    r'(youtube|youtu|youtube-nocookie)\.(com|be)/'
+    r'(watch\?v=|embed/|v/|.+\?v=)?([^&=%\?]{11})')
 
 def check_valid_url(url):
     """Memeriksa apakah URL adalah URL YouTube yang valid
@@ -24,22 +47,114 @@ def check_valid_url(url):
     if not url or not isinstance(url, str):
         return False
         
-    youtube_regex = (
-        r'(https?://)?(www\.)?'
-        r'(youtube|youtu|youtube-nocookie)\.(com|be)/'
-        r'(watch\?v=|embed/|v/|.+\?v=)?([^&=%\?]{11})')
-    
-    match = re.match(youtube_regex, url)
+    match = re.match(YOUTUBE_REGEX, url)
     return match is not None
 
-def extract_video_info(url):
+def extract_video_id(url):
+    """Mengambil ID video (11 karakter) dari URL YouTube
+    
+    Mendukung format:
+    - https://www.youtube.com/watch?v=VIDEOID
+    - https://youtu.be/VIDEOID
+    - https://www.youtube.com/shorts/VIDEOID (juga embed/, v/, live/)
+    
+    Args:
+        url (str): URL YouTube
+        
+    Returns:
+        str: ID video, atau None jika URL tidak dikenali
+    """
+    if not url or not isinstance(url, str):
+        return None
+        
+    parsed = urlparse(url if '://' in url else 'https://' + url)
+    host = (parsed.hostname or '').lower()
+    path_parts = [p for p in parsed.path.split('/') if p]
+    candidate = None
+    
+    if host == 'youtu.be':
+        candidate = path_parts[0] if path_parts else None
+    elif host.split('.')[-2:-1] in (['youtube'], ['youtube-nocookie']):
+        candidate = parse_qs(parsed.query).get('v', [None])[0]
+        if not candidate and len(path_parts) >= 2 and path_parts[0] in VIDEO_PATH_PREFIXES:
+            candidate = path_parts[1]
+    
+    if candidate and re.fullmatch(VIDEO_ID_REGEX, candidate):
+        return candidate
+    return None
+
+def get_download_dir():
+    """Mendapatkan direktori unduhan sesuai platform
+    
+    Di Android memakai folder Download di penyimpanan eksternal, di
+    platform lain ~/Downloads (dibuat jika belum ada).
+    
+    Returns:
+        str: Path direktori unduhan
+    """
+    try:
+        from android.storage import primary_external_storage_path
+        return os.path.join(primary_external_storage_path(), 'Download')
+    except ImportError:
+        download_dir = os.path.expanduser('~/Downloads')
+        if not os.path.exists(download_dir):
+            os.makedirs(download_dir)
+        return download_dir
+
+class ExtractionCancelled(Exception):
+    """Dilempar ketika ekstraksi dibatalkan melalui cancel_event"""
+
+def _check_output_cancellable(cmd, cancel_event=None):
+    """Seperti subprocess.check_output, tetapi dapat dibatalkan
+    
+    Args:
+        cmd (list): Perintah yang dijalankan
+        cancel_event (threading.Event, optional): Jika di-set, proses dihentikan
+        
+    Returns:
+        str: Output gabungan stdout dan stderr
+        
+    Raises:
+        subprocess.CalledProcessError: Jika proses keluar dengan kode bukan nol
+        ExtractionCancelled: Jika cancel_event di-set sebelum proses selesai
+    """
+    if cancel_event is None:
+        return subprocess.check_output(cmd, stderr=subprocess.STDOUT, text=True)
+    
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    try:
+        while True:
+            try:
+                output, _ = process.communicate(timeout=CANCEL_POLL_INTERVAL)
+                break
+            except subprocess.TimeoutExpired:
+                if cancel_event.is_set():
+                    raise ExtractionCancelled()
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.communicate()
+    
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, cmd, output=output)
+    return output
+
+def extract_video_info(url, retry_policy=None, cancel_event=None, info_json_path=None):
     """Mengekstrak informasi tentang video YouTube tanpa mengunduhnya
     
     Menggunakan yt-dlp untuk mendapatkan metadata video seperti judul,
     durasi, thumbnail dll.
     
+    Kegagalan sementara (timeout, HTTP 429, koneksi terputus) diulang
+    dengan exponential backoff sesuai retry_policy.
+    
     Args:
         url (str): URL YouTube yang valid
+        retry_policy (RetryPolicy, optional): Kebijakan pengulangan, default RetryPolicy()
+        cancel_event (threading.Event, optional): Jika di-set, ekstraksi dihentikan
+            dan fungsi mengembalikan None
+        info_json_path (str, optional): Jika diberikan, JSON mentah dari yt-dlp
+            disimpan di path ini agar download_video dapat melewati ekstraksi ulang
         
     Returns:
         dict: Dictionary berisi metadata video, atau None jika terjadi kesalahan
@@ -59,18 +174,57 @@ def extract_video_info(url):
         print("URL tidak valid")
         return None
         
-    try:
-        # Buat perintah untuk mendapatkan info video
-        cmd = [
-            'yt-dlp',
-            '--dump-json',
-            '--no-playlist',
-            url
-        ]
+    if retry_policy is None:
+        retry_policy = RetryPolicy()
         
-        # Jalankan perintah
-        output = subprocess.check_output(cmd, stderr=subprocess.STDOUT, text=True)
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            # Buat perintah untuk mendapatkan info video
+            cmd = [
+                'yt-dlp',
+                '--dump-json',
+                '--no-playlist',
+                '--socket-timeout', str(SOCKET_TIMEOUT),
+                url
+            ]
+            
+            # Jalankan perintah
+            output = _check_output_cancellable(cmd, cancel_event)
+            break
         
+        except ExtractionCancelled:
+            return None
+        
+        except subprocess.CalledProcessError as e:
+            print(f"Error mendapatkan info video: {e}")
+            # Tambahkan output stderr jika tersedia
+            if hasattr(e, 'stderr') and e.stderr:
+                print(f"Error output: {e.stderr}")
+                
+            # Output digabung ke stdout, jadi klasifikasikan dari sana
+            error_class = classify_error(e.output)
+            connection_health.record_failure(error_class)
+            if not retry_policy.should_retry(error_class, attempt):
+                return None
+                
+            connection_health.record_retry()
+            delay = retry_policy.get_delay(error_class, attempt)
+            print(f"Mencoba lagi ({error_class}) setelah {delay:.1f} detik")
+            
+            # Tunggu backoff, tetapi berhenti segera jika dibatalkan
+            if cancel_event is None:
+                time.sleep(delay)
+            elif cancel_event.wait(delay):
+                return None
+        except Exception as e:
+            print(f"Error tidak terduga: {e}")
+            return None
+    
+    connection_health.record_success()
+    
+    try:
         if not output.strip():
             print("Tidak ada output dari yt-dlp")
             return None
@@ -78,6 +232,11 @@ def extract_video_info(url):
         # Parse output JSON
         info = json.loads(output)
         
+        # Simpan JSON mentah untuk dipakai ulang dengan --load-info-json
+        if info_json_path:
+            with open(info_json_path, 'w') as f:
+                f.write(output)
+        
         # Format durasi
         duration_secs = info.get('duration', 0)
         minutes, seconds = divmod(duration_secs, 60)
@@ -109,19 +268,17 @@ def extract_video_info(url):
                     'width': f.get('width', 0),
                     'height': f.get('height', 0),
                     'resolution': f"{f.get('width', 0)}x{f.get('height', 0)}",
-                    'filesize': f.get('filesize', 0)
+                    'filesize': f.get('filesize', 0),
+                    'vcodec': f.get('vcodec', ''),
+                    'acodec': f.get('acodec', ''),
+                    'tbr': f.get('tbr', 0),
+                    'host': urlparse(f.get('url', '')).hostname or ''
                 }
                 for f in formats
             ]
         
         return result
     
-    except subprocess.CalledProcessError as e:
-        print(f"Error mendapatkan info video: {e}")
-        # Tambahkan output stderr jika tersedia
-        if hasattr(e, 'stderr') and e.stderr:
-            print(f"Error output: {e.stderr}")
-        return None
     except json.JSONDecodeError as e:
         print(f"Error parsing JSON: {e}")
         # Output ditangani dalam blok try khusus
@@ -130,55 +287,29 @@ def extract_video_info(url):
         print(f"Error tidak terduga: {e}")
         return None
 
-def download_video(url, download_dir, format_string, progress_hook=None):
-    """Mengunduh video dari YouTube
+def _run_download_attempt(cmd, progress_hook, error_tail):
+    """Menjalankan satu percobaan unduhan yt-dlp
     
     Args:
-        url (str): URL YouTube yang valid
-        download_dir (str): Direktori untuk menyimpan video yang diunduh
-        format_string (str): Format string yt-dlp untuk kualitas video
-        progress_hook (callable, optional): Fungsi callback untuk melaporkan kemajuan unduhan
+        cmd (list): Perintah yt-dlp lengkap
+        progress_hook (callable, optional): Fungsi callback kemajuan unduhan
+        error_tail (deque): Penampung baris output non-progres terakhir
         
     Returns:
-        tuple: (info, filepath) - info adalah dictionary dengan metadata video, 
-               filepath adalah path file video yang diunduh. 
-               Jika terjadi error, keduanya akan None.
+        tuple: (returncode, info, filepath)
     """
-    # Variabel untuk melacak progres dan proses
-    downloaded_bytes = 0
-    total_bytes = 0
-    process = None
-    filepath = None
     info = None
+    filepath = None
+    process = subprocess.Popen(
+        cmd, 
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True, 
+        bufsize=1,
+        universal_newlines=True
+    )
     
     try:
-        # Pastikan direktori download ada
-        if not os.path.exists(download_dir):
-            os.makedirs(download_dir)
-            
-        # Format perintah untuk unduhan
-        cmd = [
-            'yt-dlp',
-            '--format', format_string,
-            '--newline',
-            '--progress',
-            '--no-playlist',
-            '--output', os.path.join(download_dir, '%(title)s.%(ext)s'),
-            '--print-json',
-            '--restrict-filenames',
-            url
-        ]
-        
-        # Mulai proses unduhan
-        process = subprocess.Popen(
-            cmd, 
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True, 
-            bufsize=1,
-            universal_newlines=True
-        )
-        
         # Jika stdout tidak tersedia, hentikan proses
         if process.stdout is None:
             raise Exception("Tidak dapat membaca output dari proses unduhan")
@@ -199,9 +330,10 @@ def download_video(url, download_dir, format_string, progress_hook=None):
                 continue
             
             # Parse informasi kemajuan
+            progress_match = None
             if '[download]' in line:
                 # Coba ekstrak informasi kemajuan
-                progress_match = re.search(r'(\d+\.\d+)% of (\d+\.\d+)(\w+)', line)
+                progress_match = re.search(r'(\d+\.\d+)% of\s+~?\s*(\d+\.\d+)(\w+)', line)
                 if progress_match:
                     percent = float(progress_match.group(1))
                     size = float(progress_match.group(2))
@@ -215,21 +347,115 @@ def download_video(url, download_dir, format_string, progress_hook=None):
                     elif unit == 'GiB':
                         size *= 1024 * 1024 * 1024
                     
-                    total_bytes = size
-                    downloaded_bytes = size * (percent / 100.0)
-                    
                     # Panggil progress hook jika disediakan
                     if progress_hook:
                         progress_hook({
                             'status': 'downloading',
-                            'downloaded_bytes': downloaded_bytes,
-                            'total_bytes': total_bytes,
+                            'downloaded_bytes': size * (percent / 100.0),
+                            'total_bytes': size,
                             'filename': filepath
                         })
+            
+            # Simpan baris lain untuk klasifikasi error bila proses gagal
+            if line and not progress_match:
+                error_tail.append(line)
         
-        # Tunggu proses selesai
-        if process.wait() != 0:
-            raise Exception(f"yt-dlp exited with code {process.returncode}")
+        return process.wait(), info, filepath
+    finally:
+        # Hentikan proses jika masih berjalan
+        if process.poll() is None:
+            try:
+                process.terminate()
+            except:
+                pass  # Abaikan jika tidak dapat menghentikan proses
+
+def download_video(url, download_dir, format_string, progress_hook=None,
+                   retry_policy=None, health=None, info_json=None):
+    """Mengunduh video dari YouTube
+    
+    Kegagalan sementara diulang dengan exponential backoff. yt-dlp dijalankan
+    dengan --continue sehingga percobaan ulang melanjutkan file .part yang
+    sudah ada, bukan mengunduh dari awal. Jumlah fragmen paralel dan ukuran
+    chunk diambil dari ConnectionHealth dan menyesuaikan kondisi jaringan.
+    
+    Jika info_json diberikan (hasil extract_video_info dengan info_json_path),
+    yt-dlp memuat metadata dari file tersebut sehingga unduhan langsung dimulai
+    tanpa ekstraksi ulang. URL format YouTube dapat kedaluwarsa; jika percobaan
+    gagal dengan HTTP 403, percobaan berikutnya kembali memakai URL asli.
+    
+    Args:
+        url (str): URL YouTube yang valid
+        download_dir (str): Direktori untuk menyimpan video yang diunduh
+        format_string (str): Format string yt-dlp untuk kualitas video
+        progress_hook (callable, optional): Fungsi callback untuk melaporkan kemajuan unduhan
+        retry_policy (RetryPolicy, optional): Kebijakan pengulangan, default RetryPolicy()
+        health (ConnectionHealth, optional): Pelacak kesehatan koneksi,
+            default instance bersama connection_health
+        info_json (str, optional): Path file JSON info hasil ekstraksi sebelumnya
+        
+    Returns:
+        tuple: (info, filepath) - info adalah dictionary dengan metadata video, 
+               filepath adalah path file video yang diunduh. 
+               Jika terjadi error, keduanya akan None.
+    """
+    if retry_policy is None:
+        retry_policy = RetryPolicy()
+    if health is None:
+        health = connection_health
+    
+    try:
+        # Pastikan direktori download ada
+        if not os.path.exists(download_dir):
+            os.makedirs(download_dir)
+        
+        attempt = 0
+        while True:
+            attempt += 1
+            
+            # Format perintah untuk unduhan
+            cmd = [
+                'yt-dlp',
+                '--format', format_string,
+                '--newline',
+                '--progress',
+                '--no-playlist',
+                '--continue',
+                '--socket-timeout', str(SOCKET_TIMEOUT),
+                '--output', os.path.join(download_dir, '%(title)s.%(ext)s'),
+                '--print-json',
+                '--restrict-filenames',
+            ] + health.get_download_args()
+            
+            if info_json and os.path.exists(info_json):
+                cmd += ['--load-info-json', info_json]
+            else:
+                cmd.append(url)
+            
+            error_tail = deque(maxlen=ERROR_TAIL_LINES)
+            returncode, info, filepath = _run_download_attempt(cmd, progress_hook, error_tail)
+            
+            if returncode == 0:
+                health.record_success()
+                break
+            
+            error_class = classify_error(list(error_tail))
+            health.record_failure(error_class)
+            if error_class == ERROR_HTTP_403:
+                # URL format yang tersimpan kemungkinan kedaluwarsa
+                info_json = None
+            if not retry_policy.should_retry(error_class, attempt):
+                raise Exception(f"yt-dlp exited with code {returncode} ({error_class})")
+            
+            health.record_retry()
+            delay = retry_policy.sleep(error_class, attempt)
+            print(f"Unduhan gagal ({error_class}), mencoba lagi setelah {delay:.1f} detik")
+            if progress_hook:
+                progress_hook({
+                    'status': 'retrying',
+                    'error_class': error_class,
+                    'attempt': attempt + 1,
+                    'filename': filepath
+                })
         
         # Panggil progress hook dengan status selesai
         if progress_hook and filepath:
@@ -255,10 +481,4 @@ def download_video(url, download_dir, format_string, progress_hook=None):
     
     except Exception as e:
         print(f"Download error: {e}")
-        # Hentikan proses jika masih berjalan
-        if process is not None and process.poll() is None:
-            try:
-                process.terminate()
-            except:
-                pass  # Abaikan jika tidak dapat menghentikan proses
         return None, None
@@ -0,0 +1,605 @@
+"""Mode worker untuk membagi unduhan ke banyak proses atau mesin
+
+Koordinator dan worker berkomunikasi hanya lewat direktori spool bersama
+(lokal, atau NFS/SMB untuk beberapa node):
+
+    spool/
+        queue/shared/        job yang belum ditugaskan
+        queue/<worker_id>/   job yang ditugaskan ke worker tertentu
+        running/             job yang sedang dikerjakan
+        leases/              lease per job (pemilik dan waktu kedaluwarsa)
+        workers/             heartbeat per worker
+        results/             hasil yang belum digabung ke riwayat
+        done/                hasil yang sudah digabung
+
+Job diklaim dengan os.rename ke running/, yang atomik pada satu sistem
+file sehingga hanya satu worker yang berhasil. Worker memperbarui lease
+secara berkala; job dengan lease kedaluwarsa dikembalikan ke antrean oleh
+koordinator. Worker yang menganggur mengambil job dari antrean worker lain
+(work stealing). Hanya koordinator yang menulis ke DownloadHistory.
+
+Penggunaan:
+    python worker.py coordinator --spool DIR --workers 4 URL [URL ...]
+    python worker.py worker --spool DIR
+
+--download-func modul:fungsi mengganti fungsi unduh (default
+utils.download_video), mis. dengan stub dari benchmark_worker.py untuk
+menguji pembagian job tanpa jaringan.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import hashlib
+import argparse
+import importlib
+import threading
+import multiprocessing
+
+from utils import download_video, get_download_dir
+from download_history import DownloadHistory
+
+SHARED_QUEUE = 'shared'
+
+
+def _write_json(path, data):
+    """Menulis JSON secara atomik (aman dibaca proses lain kapan saja)"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    """Membaca JSON, mengembalikan None jika file hilang atau rusak"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _list_json(directory):
+    """Daftar file .json di direktori, dari yang terlama"""
+    try:
+        names = [n for n in os.listdir(directory) if n.endswith('.json')]
+    except FileNotFoundError:
+        return []
+    return sorted(names)
+
+
+def file_sha256(filepath, chunk_size=1024 * 1024):
+    """Menghitung hash SHA-256 file
+
+    Args:
+        filepath (str): Path file
+        chunk_size (int, optional): Ukuran blok baca dalam byte
+
+    Returns:
+        str: Hash heksadesimal, atau None jika file tidak dapat dibaca
+    """
+    digest = hashlib.sha256()
+    try:
+        with open(filepath, 'rb') as f:
+            for block in iter(lambda: f.read(chunk_size), b''):
+                digest.update(block)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+class Spool:
+    """Tata letak direktori spool bersama
+
+    Attributes:
+        root (str): Direktori spool
+        lease_timeout (float): Detik sebelum lease atau heartbeat dianggap mati
+    """
+
+    def __init__(self, root, lease_timeout=60):
+        self.root = root
+        self.lease_timeout = lease_timeout
+        for name in ('running', 'leases', 'workers', 'results', 'done',
+                     os.path.join('queue', SHARED_QUEUE)):
+            os.makedirs(self.path(name), exist_ok=True)
+
+    def path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def queue_dir(self, name):
+        directory = self.path('queue', name)
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+    def queue_names(self):
+        try:
+            return sorted(os.listdir(self.path('queue')))
+        except FileNotFoundError:
+            return []
+
+    def fail_running(self, name, job, error):
+        """Menulis hasil gagal untuk job di running/ lalu menghapusnya
+
+        Args:
+            name (str): Nama file job
+            job (dict): Isi job, atau None jika file tidak dapat dibaca
+            error (str): Pesan error untuk hasil
+        """
+        job = job or {}
+        _write_json(self.path('results', name), {
+            'job_id': job.get('id', name[:-len('.json')]),
+            'url': job.get('url', ''),
+            'status': 'failed',
+            'error': error
+        })
+        try:
+            os.remove(self.path('running', name))
+        except OSError:
+            pass
+
+    def live_workers(self):
+        """Mendapatkan ID worker yang heartbeat-nya masih baru
+
+        Returns:
+            list: ID worker yang hidup
+        """
+        now = time.time()
+        workers = []
+        for name in _list_json(self.path('workers')):
+            heartbeat = _read_json(self.path('workers', name))
+            if heartbeat and now - heartbeat.get('last_seen', 0) < self.lease_timeout:
+                workers.append(heartbeat['worker_id'])
+        return workers
+
+
+class Coordinator:
+    """Membagikan job ke worker dan menggabungkan hasilnya ke riwayat
+
+    Attributes:
+        spool (Spool): Direktori spool bersama
+        history (DownloadHistory): Riwayat tujuan penggabungan hasil
+        max_attempts (int): Jumlah klaim maksimum sebelum job dianggap gagal
+    """
+
+    def __init__(self, spool_dir, history=None, lease_timeout=60, max_attempts=3):
+        self.spool = Spool(spool_dir, lease_timeout)
+        self.history = history if history is not None else DownloadHistory()
+        self.max_attempts = max_attempts
+
+    def submit(self, url, format_string='best'):
+        """Menambahkan job unduhan
+
+        Job ditugaskan ke worker hidup dengan antrean terpendek; jika belum
+        ada worker, job masuk antrean bersama.
+
+        Args:
+            url (str): URL video YouTube
+            format_string (str, optional): Format string yt-dlp
+
+        Returns:
+            str: ID job
+        """
+        job = {
+            'id': f"{time.time_ns()}-{uuid.uuid4().hex[:8]}",
+            'url': url,
+            'format_string': format_string,
+            'attempts': 0,
+            'submitted': time.time()
+        }
+
+        workers = self.spool.live_workers()
+        if workers:
+            target = min(workers, key=lambda w: len(_list_json(self.spool.queue_dir(w))))
+        else:
+            target = SHARED_QUEUE
+
+        _write_json(os.path.join(self.spool.queue_dir(target), f"{job['id']}.json"), job)
+        return job['id']
+
+    def reap_expired(self):
+        """Mengembalikan job dengan lease kedaluwarsa ke antrean bersama
+
+        Returns:
+            int: Jumlah job yang dikembalikan atau dinyatakan gagal
+        """
+        now = time.time()
+        reaped = 0
+        for name in _list_json(self.spool.path('running')):
+            running_path = self.spool.path('running', name)
+            lease = _read_json(self.spool.path('leases', name))
+
+            if lease is not None:
+                if lease.get('expires', 0) > now:
+                    continue
+            else:
+                # Worker mungkin baru saja mengklaim dan belum menulis lease
+                try:
+                    if now - os.path.getmtime(running_path) < self.spool.lease_timeout:
+                        continue
+                except OSError:
+                    continue
+
+            job = _read_json(running_path)
+            if job is None:
+                if not os.path.exists(running_path):
+                    continue  # Sudah selesai di antara listdir dan pembacaan
+                # File rusak tidak bisa diantrekan ulang; tanpa hasil ini
+                # pending_count() dan wait() tidak akan pernah selesai
+                self.spool.fail_running(name, None, 'job file unreadable')
+            elif job.get('attempts', 0) >= self.max_attempts:
+                self.spool.fail_running(name, job, 'lease expired too many times')
+            else:
+                try:
+                    os.rename(running_path, os.path.join(self.spool.queue_dir(SHARED_QUEUE), name))
+                except OSError:
+                    continue  # Job sudah selesai atau diambil ulang
+            self._remove(self.spool.path('leases', name))
+            reaped += 1
+        return reaped
+
+    def collect_results(self):
+        """Menggabungkan hasil worker ke DownloadHistory
+
+        Hasil dipindah ke done/ setelah digabung, sehingga hasil ganda (mis.
+        job yang diklaim ulang setelah lease kedaluwarsa) hanya dicatat sekali.
+        Hasil 'completed' menggantikan hasil 'failed' yang tercatat lebih dulu,
+        tetapi tidak sebaliknya. File yang hash SHA-256-nya sudah ada di
+        riwayat tidak dicatat ulang.
+
+        Returns:
+            list: Hasil yang baru digabung
+        """
+        collected = []
+        for name in _list_json(self.spool.path('results')):
+            result_path = self.spool.path('results', name)
+            done_path = self.spool.path('done', name)
+            result = _read_json(result_path)
+            if result is None:
+                continue
+
+            done = _read_json(done_path)
+            if done is not None and (done.get('status') == 'completed'
+                                     or result.get('status') != 'completed'):
+                # Hasil ganda yang tidak menambah informasi
+                self._remove(result_path)
+                continue
+
+            if result.get('status') == 'completed':
+                sha256 = result.get('sha256') or ''
+                if self.history.has_checksum(sha256):
+                    # URL berbeda (mis. video yang diunggah ulang) dengan isi file sama
+                    print(f"File sudah ada di riwayat, tidak dicatat ulang: {result['filepath']}")
+                else:
+                    self.history.add_download(
+                        title=result.get('title', 'Unknown'),
+                        url=result['url'],
+                        filepath=result['filepath'],
+                        thumbnail=result.get('thumbnail', ''),
+                        uploader=result.get('uploader', ''),
+                        sha256=sha256
+                    )
+
+            collected.append(result)
+            os.replace(result_path, done_path)
+        return collected
+
+    def pending_count(self):
+        """Jumlah job yang masih antre atau sedang berjalan"""
+        queued = sum(len(_list_json(self.spool.queue_dir(q))) for q in self.spool.queue_names())
+        return queued + len(_list_json(self.spool.path('running')))
+
+    def wait(self, job_ids, poll_interval=1.0, timeout=None):
+        """Menunggu job selesai sambil mengembalikan lease mati dan menggabungkan hasil
+
+        Args:
+            job_ids (list): ID job yang ditunggu
+            poll_interval (float, optional): Jeda antar pemeriksaan dalam detik
+            timeout (float, optional): Batas waktu menunggu dalam detik
+
+        Returns:
+            dict: ID job -> hasil, untuk job yang selesai
+        """
+        wanted = set(job_ids)
+        remaining = set(wanted)
+        results = {}
+        deadline = None if timeout is None else time.time() + timeout
+
+        while remaining:
+            self.reap_expired()
+            for result in self.collect_results():
+                # Hasil 'completed' yang datang belakangan menggantikan 'failed'
+                if result['job_id'] in wanted:
+                    remaining.discard(result['job_id'])
+                    results[result['job_id']] = result
+
+            if not remaining or (deadline is not None and time.time() > deadline):
+                break
+            time.sleep(poll_interval)
+        return results
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class Worker:
+    """Proses pengerja yang mengklaim dan menjalankan job dari spool
+
+    Attributes:
+        worker_id (str): ID unik worker (host-pid)
+        download_dir (str): Direktori tujuan unduhan
+        heartbeat_interval (float): Jeda pembaruan heartbeat dan lease
+        poll_interval (float): Jeda pemeriksaan antrean saat menganggur
+    """
+
+    def __init__(self, spool_dir, worker_id=None, download_dir=None,
+                 download_func=download_video, lease_timeout=60,
+                 heartbeat_interval=10, poll_interval=1.0):
+        self.spool = Spool(spool_dir, lease_timeout)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.download_dir = download_dir or get_download_dir()
+        self.download_func = download_func
+        self.heartbeat_interval = heartbeat_interval
+        self.poll_interval = poll_interval
+        self._current_job = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def heartbeat(self):
+        """Memperbarui heartbeat worker dan lease job yang sedang dikerjakan"""
+        now = time.time()
+        _write_json(self.spool.path('workers', f"{self.worker_id}.json"), {
+            'worker_id': self.worker_id,
+            'host': socket.gethostname(),
+            'pid': os.getpid(),
+            'last_seen': now
+        })
+
+        with self._lock:
+            job_name = self._current_job
+        # Lease yang sudah diambil alih worker lain tidak diperpanjang
+        if job_name is not None and self._owns_lease(job_name):
+            self._write_lease(job_name, now)
+
+    def _write_lease(self, job_name, now):
+        _write_json(self.spool.path('leases', job_name), {
+            'worker_id': self.worker_id,
+            'expires': now + self.spool.lease_timeout
+        })
+
+    def _owns_lease(self, job_name):
+        """Memeriksa apakah lease job masih milik worker ini
+
+        Lease hilang atau berpindah pemilik jika koordinator menganggapnya
+        kedaluwarsa dan mengembalikan job ke antrean.
+        """
+        lease = _read_json(self.spool.path('leases', job_name))
+        return lease is not None and lease.get('worker_id') == self.worker_id
+
+    def _heartbeat_loop(self):
+        while not self._stop_event.wait(self.heartbeat_interval):
+            try:
+                self.heartbeat()
+            except OSError as e:
+                print(f"Error memperbarui heartbeat: {e}")
+
+    def _claim_order(self):
+        """Urutan antrean yang dicoba: milik sendiri, bersama, lalu curian
+
+        Antrean worker lain diurutkan dari yang paling panjang.
+        """
+        own = self.spool.queue_dir(self.worker_id)
+        others = [q for q in self.spool.queue_names() if q not in (self.worker_id, SHARED_QUEUE)]
+        others.sort(key=lambda q: len(_list_json(self.spool.queue_dir(q))), reverse=True)
+        return [own, self.spool.queue_dir(SHARED_QUEUE)] + [self.spool.queue_dir(q) for q in others]
+
+    def claim(self):
+        """Mengklaim satu job
+
+        Returns:
+            dict: Job yang diklaim, atau None jika semua antrean kosong
+        """
+        for queue_dir in self._claim_order():
+            for name in _list_json(queue_dir):
+                queue_path = os.path.join(queue_dir, name)
+                running_path = self.spool.path('running', name)
+                try:
+                    os.rename(queue_path, running_path)
+                except OSError:
+                    continue  # Diambil worker lain lebih dulu
+
+                # rename mempertahankan mtime lama; perbarui agar koordinator
+                # tidak menganggap klaim yang belum punya lease sudah mati
+                try:
+                    os.utime(running_path)
+                except OSError:
+                    # Kembalikan ke antrean; jika gagal juga, koordinator
+                    # mengantrekannya ulang karena tidak punya lease
+                    try:
+                        os.rename(running_path, queue_path)
+                    except OSError:
+                        pass
+                    continue
+
+                job = _read_json(running_path)
+                if job is None:
+                    self.spool.fail_running(name, None, 'job file unreadable')
+                    continue
+
+                job['attempts'] = job.get('attempts', 0) + 1
+                job['worker_id'] = self.worker_id
+                _write_json(running_path, job)
+                self._write_lease(name, time.time())
+                with self._lock:
+                    self._current_job = name
+                self.heartbeat()
+                return job
+        return None
+
+    def process(self, job):
+        """Menjalankan job dan menulis hasilnya ke results/
+
+        Hashing file dilakukan di worker agar beban CPU tersebar.
+
+        Args:
+            job (dict): Job yang diklaim
+        """
+        name = f"{job['id']}.json"
+        result = {'job_id': job['id'], 'url': job['url'], 'worker_id': self.worker_id}
+        try:
+            info, filepath = self.download_func(job['url'], self.download_dir, job['format_string'])
+            if info and filepath:
+                result.update({
+                    'status': 'completed',
+                    'title': info.get('title', 'Unknown'),
+                    'filepath': filepath,
+                    'thumbnail': info.get('thumbnail', ''),
+                    'uploader': info.get('uploader', ''),
+                    'sha256': file_sha256(filepath)
+                })
+            else:
+                result.update({'status': 'failed', 'error': 'download failed'})
+        except Exception as e:
+            result.update({'status': 'failed', 'error': str(e)})
+
+        _write_json(self.spool.path('results', name), result)
+
+        with self._lock:
+            self._current_job = None
+        # Jika lease sempat kedaluwarsa, job mungkin sudah diklaim worker lain;
+        # file running/ dan lease miliknya tidak boleh dihapus
+        if not self._owns_lease(name):
+            return
+        for path in (self.spool.path('running', name), self.spool.path('leases', name)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def run(self, exit_when_idle=False):
+        """Loop utama worker
+
+        Args:
+            exit_when_idle (bool, optional): Berhenti saat semua antrean kosong
+        """
+        self.heartbeat()
+        heartbeat_thread = threading.Thread(target=self._heartbeat_loop, daemon=True)
+        heartbeat_thread.start()
+        try:
+            while not self._stop_event.is_set():
+                job = self.claim()
+                if job is not None:
+                    self.process(job)
+                    continue
+                if exit_when_idle:
+                    break
+                self._stop_event.wait(self.poll_interval)
+        finally:
+            self._stop_event.set()
+            heartbeat_thread.join()
+            try:
+                os.remove(self.spool.path('workers', f"{self.worker_id}.json"))
+            except OSError:
+                pass
+
+    def stop(self):
+        """Meminta worker berhenti setelah job saat ini selesai"""
+        self._stop_event.set()
+
+
+def load_download_func(spec):
+    """Memuat fungsi unduh dari string 'modul:fungsi'
+
+    Fungsi harus menerima (url, download_dir, format_string) dan
+    mengembalikan (info, filepath) seperti utils.download_video.
+
+    Args:
+        spec (str): Nama modul dan fungsi, mis. 'benchmark_worker:stub_download'
+
+    Returns:
+        callable: Fungsi unduh
+    """
+    module_name, _, func_name = spec.partition(':')
+    if not module_name or not func_name:
+        raise ValueError(f"Format --download-func harus modul:fungsi, bukan {spec!r}")
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def _worker_main(spool_dir, worker_kwargs):
+    Worker(spool_dir, **worker_kwargs).run()
+
+
+def start_local_workers(spool_dir, count, **worker_kwargs):
+    """Menjalankan beberapa worker sebagai proses lokal
+
+    Args:
+        spool_dir (str): Direktori spool bersama
+        count (int): Jumlah proses worker
+        **worker_kwargs: Argumen tambahan untuk Worker
+
+    Returns:
+        list: Objek multiprocessing.Process yang sudah dimulai
+    """
+    processes = []
+    for _ in range(count):
+        process = multiprocessing.Process(target=_worker_main, args=(spool_dir, worker_kwargs), daemon=True)
+        process.start()
+        processes.append(process)
+    return processes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Unduhan terdistribusi lewat direktori spool")
+    subparsers = parser.add_subparsers(dest='mode', required=True)
+
+    coordinator_parser = subparsers.add_parser('coordinator', help="Mengirim job dan menggabungkan hasil")
+    coordinator_parser.add_argument('--spool', required=True)
+    coordinator_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                                    help="Jumlah worker lokal yang dijalankan (0 untuk hanya memakai worker jarak jauh)")
+    coordinator_parser.add_argument('--format', default='best')
+    coordinator_parser.add_argument('--download-dir')
+    coordinator_parser.add_argument('--data-dir', help="Direktori DownloadHistory")
+    coordinator_parser.add_argument('--download-func', help="Fungsi unduh worker lokal (modul:fungsi)")
+    coordinator_parser.add_argument('urls', nargs='+')
+
+    worker_parser = subparsers.add_parser('worker', help="Menjalankan satu worker")
+    worker_parser.add_argument('--spool', required=True)
+    worker_parser.add_argument('--download-dir')
+    worker_parser.add_argument('--download-func', help="Fungsi unduh (modul:fungsi)")
+
+    args = parser.parse_args(argv)
+
+    worker_kwargs = {'download_dir': args.download_dir}
+    if args.download_func:
+        try:
+            worker_kwargs['download_func'] = load_download_func(args.download_func)
+        except (ValueError, ImportError, AttributeError) as e:
+            parser.error(str(e))
+
+    if args.mode == 'worker':
+        Worker(args.spool, **worker_kwargs).run()
+        return 0
+
+    coordinator = Coordinator(args.spool, DownloadHistory(args.data_dir))
+    processes = start_local_workers(args.spool, args.workers, **worker_kwargs)
+    try:
+        job_ids = [coordinator.submit(url, args.format) for url in args.urls]
+        results = coordinator.wait(job_ids)
+    finally:
+        for process in processes:
+            process.terminate()
+
+    failed = [r for r in results.values() if r.get('status') != 'completed']
+    print(f"{len(results) - len(failed)} berhasil, {len(failed)} gagal")
+    for result in failed:
+        print(f"  {result['url']}: {result.get('error', '')}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())